@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
@@ -52,6 +54,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -143,8 +146,116 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+# FastJSONRenderer and FastJSONParser use orjson when it is installed and
+# behave like the DRF JSON classes otherwise. Clients may also exchange
+# MessagePack with Accept / Content-Type: application/msgpack.
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'core.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Use a cache shared by all workers (e.g. file based on a common volume)
+# in deployments, as data versions and token invalidation rely on it.
+# Never put a file based cache below a directory served by the proxy.
+# Backends cull entries once they hold more than MAX_ENTRIES keys, the
+# file based one on every write, so keep it well above the working set.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 100000)),
+        },
+    },
+    'responses': {
+        'BACKEND': os.environ.get(
+            'RESPONSE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'responses'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 10000)
+            ),
+        },
+    },
+}
+
+DATA_VERSION_CACHE = os.environ.get('DATA_VERSION_CACHE', 'default')
+
+# Entries are evicted by signals on data changes, not by TTL.
+RESPONSE_CACHE = {
+    'ENABLED': bool(int(os.environ.get('RESPONSE_CACHE_ENABLED', 0))),
+    'CACHE': 'responses',
+    'TIMEOUT': None,
+    'SINGLE_FLIGHT_TIMEOUT': 10,
+    'SINGLE_FLIGHT_POLL_INTERVAL': 0.05,
+}
+
+# Compressed bodies of responses with an ETag are kept in CACHE, keyed by
+# the ETag, so a new data version never reuses them.
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024)),
+    'GZIP_LEVEL': int(os.environ.get('RESPONSE_COMPRESSION_GZIP_LEVEL', 6)),
+    'BROTLI_QUALITY': int(
+        os.environ.get('RESPONSE_COMPRESSION_BROTLI_QUALITY', 5)
+    ),
+    'CACHE': 'responses',
+    'CACHE_TIMEOUT': int(
+        os.environ.get('RESPONSE_COMPRESSION_CACHE_TIMEOUT', 3600)
+    ),
+}
+
+TOKEN_AUTH_CACHE = {
+    'CACHE': os.environ.get('TOKEN_AUTH_CACHE', 'default'),
+    'TIMEOUT': int(os.environ.get('TOKEN_AUTH_CACHE_TIMEOUT', 300)),
+    'LOCAL_TIMEOUT': int(os.environ.get('TOKEN_AUTH_LOCAL_TIMEOUT', 5)),
+    'LOCAL_MAX_SIZE': int(os.environ.get('TOKEN_AUTH_LOCAL_MAX_SIZE', 1024)),
+}
+
+# Longest side in pixels of resized recipe images, and worker threads
+# creating them. With 0 workers variants are made in the request. With
+# RECIPE_IMAGE_WORKER_PROCESS set, web workers leave them to a separate
+# `manage.py generate_image_variants --loop` process.
+RECIPE_IMAGE_VARIANT_SIZES = [128, 512, 1024]
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+RECIPE_IMAGE_WORKER_PROCESS = bool(
+    int(os.environ.get('RECIPE_IMAGE_WORKER_PROCESS', 0))
+)
+
+# 'content' stores each distinct recipe image once under its sha256 digest,
+# shared by reference count; 'uuid' stores every upload under a new name.
+RECIPE_IMAGE_STORAGE = os.environ.get('RECIPE_IMAGE_STORAGE', 'content')
+
+# Limits of uploaded recipe images. Uploads are streamed to disk and fully
+# decoded in a child process limited to VERIFY_MEMORY bytes and
+# VERIFY_TIMEOUT seconds. The child runs VERIFY_PYTHON, as sys.executable
+# is the uwsgi binary when serving with uWSGI.
+RECIPE_IMAGE_UPLOAD = {
+    'MAX_BYTES': int(os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10 * 2**20)),
+    'MAX_PIXELS': int(os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40_000_000)),
+    'VERIFY_MEMORY': int(
+        os.environ.get('RECIPE_IMAGE_VERIFY_MEMORY', 512 * 2**20)
+    ),
+    'VERIFY_TIMEOUT': int(os.environ.get('RECIPE_IMAGE_VERIFY_TIMEOUT', 5)),
+    'VERIFY_PYTHON': os.environ.get(
+        'RECIPE_IMAGE_VERIFY_PYTHON',
+        '/py/bin/python' if os.path.exists('/py/bin/python')
+        else sys.executable,
+    ),
 }
 
 SPECTACULAR_SETTINGS = {
@@ -0,0 +1,144 @@
+"""
+Cached token authentication.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class LocalLRUCache:
+    """Thread safe in-process LRU cache with a TTL."""
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return value for key or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store value and evict the least recently used entries."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+
+def _get_setting(name):
+    """Return token auth cache setting."""
+    return settings.TOKEN_AUTH_CACHE[name]
+
+
+local_cache = LocalLRUCache(
+    max_size=_get_setting('LOCAL_MAX_SIZE'),
+    timeout=_get_setting('LOCAL_TIMEOUT'),
+)
+
+
+def token_cache_key(key):
+    """Return cache key for a token without exposing the token."""
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'auth-token:{digest}'
+
+
+def invalidate_token(key):
+    """Drop cached authentication for a token key."""
+    cache_key = token_cache_key(key)
+    local_cache.delete(cache_key)
+    caches[_get_setting('CACHE')].delete(cache_key)
+
+
+# Columns cached per token, never the password hash. Other user fields
+# stay deferred and load from the database on first access.
+TOKEN_FIELDS = ('key', 'user_id', 'created')
+USER_FIELDS = ('id', 'email', 'name', 'is_active', 'is_staff', 'is_superuser')
+
+
+def token_payload(token):
+    """Return cacheable {'token': [...], 'user': [...]} column values."""
+    return {
+        'token': [getattr(token, field) for field in TOKEN_FIELDS],
+        'user': [getattr(token.user, field) for field in USER_FIELDS],
+    }
+
+
+def _from_db(model, fields, values):
+    """Return model instance with values of fields, others deferred."""
+    values = dict(zip(fields, values))
+    field_names = [
+        field.attname for field in model._meta.concrete_fields
+        if field.attname in values
+    ]
+
+    return model.from_db(
+        'default',
+        field_names,
+        [values[name] for name in field_names],
+    )
+
+
+def token_from_payload(payload):
+    """Return a new token with its user built from cached column values."""
+    token = _from_db(Token, TOKEN_FIELDS, payload['token'])
+    token.user = _from_db(get_user_model(), USER_FIELDS, payload['user'])
+
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching the resolved token and user.
+
+    Entries live in a per-process LRU backed by a shared Django cache and
+    are invalidated by signals in core.signals. Other processes may keep
+    serving a local entry for at most LOCAL_TIMEOUT seconds. Only the
+    columns in TOKEN_FIELDS and USER_FIELDS are cached.
+    """
+
+    def authenticate_credentials(self, key):
+        """Return (user, token) from cache or the database."""
+        cache_key = token_cache_key(key)
+        payload = local_cache.get(cache_key)
+        if payload is None:
+            shared_cache = caches[_get_setting('CACHE')]
+            payload = shared_cache.get(cache_key)
+            if payload is None:
+                user, token = super().authenticate_credentials(key)
+                payload = token_payload(token)
+                shared_cache.set(cache_key, payload, _get_setting('TIMEOUT'))
+            local_cache.set(cache_key, payload)
+
+        # Each request gets its own instances so changes never leak into
+        # the cache.
+        token = token_from_payload(payload)
+        return (token.user, token)
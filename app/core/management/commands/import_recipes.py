@@ -0,0 +1,306 @@
+"""
+Django command to import recipes from NDJSON or CSV in batches.
+"""
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import (
+    ImportCheckpoint,
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.versions import bump_user_version
+
+
+class Command(BaseCommand):
+    """Django management command to import recipes."""
+    help = 'Import recipes from an NDJSON or CSV file in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin.')
+        parser.add_argument(
+            '--format',
+            choices=['ndjson', 'csv'],
+            help='Input format, guessed from the file extension by default.',
+        )
+        parser.add_argument(
+            '--user',
+            help='Email of the owner of rows without a user column.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Key of the checkpoint recording committed rows, the '
+                 'absolute input path by default. Rerunning resumes after '
+                 'the last batch.',
+        )
+        parser.add_argument(
+            '--list-separator',
+            default='|',
+            help='Separator of tag and ingredient names in CSV input.',
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Insert with bulk_create instead of PostgreSQL COPY.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = options['path']
+        self.batch_size = options['batch_size']
+        self.list_separator = options['list_separator']
+        self.use_copy = (
+            not options['no_copy'] and connection.vendor == 'postgresql'
+        )
+        self.default_user = options['user']
+        self.user_ids = {}
+        self.attr_ids = {Tag: {}, Ingredient: {}}
+        fmt = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'ndjson'
+        )
+        checkpoint = options['checkpoint']
+        if checkpoint is None and path != '-':
+            checkpoint = os.path.abspath(path)
+
+        done = self._read_checkpoint(checkpoint)
+        if done:
+            self.stdout.write(f'Resuming after {done} rows.')
+
+        imported = 0
+        started = time.monotonic()
+        with self._open(path) as stream:
+            rows = self._parse(stream, fmt, skip=done)
+            while True:
+                batch = list(itertools.islice(rows, self.batch_size))
+                if not batch:
+                    break
+                done += len(batch)
+                self._load_batch(batch, checkpoint, done)
+                imported += len(batch)
+                rate = imported / max(time.monotonic() - started, 1e-9)
+                self.stdout.write(
+                    f'Imported {imported} recipes ({rate:.0f} recipes/s).'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Import finished: {imported} recipes, {done} rows committed.'
+        ))
+
+    def _open(self, path):
+        """Return input stream for path."""
+        if path == '-':
+            return open(sys.stdin.fileno(), encoding='utf-8', closefd=False)
+        try:
+            return open(path, encoding='utf-8', newline='')
+        except OSError as exc:
+            raise CommandError(f'Cannot open {path}: {exc}')
+
+    def _read_checkpoint(self, checkpoint):
+        """Return number of rows committed by a previous run."""
+        if not checkpoint:
+            return 0
+        rows = ImportCheckpoint.objects.filter(key=checkpoint).values_list(
+            'rows',
+            flat=True,
+        )
+
+        return rows.first() or 0
+
+    def _parse(self, stream, fmt, skip=0):
+        """Yield normalized rows from the input stream after skip rows."""
+        if fmt == 'csv':
+            records = csv.DictReader(stream)
+        else:
+            records = (line for line in stream if line.strip())
+        records = itertools.islice(records, skip, None)
+        for number, record in enumerate(records, start=skip + 1):
+            try:
+                if fmt != 'csv':
+                    record = json.loads(record)
+                yield self._normalize(record)
+            except (KeyError, ValueError, InvalidOperation, TypeError,
+                    AttributeError) as exc:
+                raise CommandError(f'Invalid row {number}: {exc!r}')
+
+    def _names(self, value):
+        """Return list of names from a CSV cell or JSON list."""
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.split(self.list_separator)
+        names = [
+            item['name'] if isinstance(item, dict) else item
+            for item in value
+        ]
+        return list(dict.fromkeys(name.strip() for name in names if name))
+
+    def _normalize(self, record):
+        """Return row dict with typed values and resolved user id."""
+        return {
+            'user_id': self._user_id(record.get('user') or self.default_user),
+            'title': record['title'],
+            'description': record.get('description') or '',
+            'time_minutes': int(record['time_minutes']),
+            'price': Decimal(str(record['price'])),
+            'tags': self._names(record.get('tags')),
+            'ingredients': self._names(record.get('ingredients')),
+        }
+
+    def _user_id(self, email):
+        """Return id of user with email, cached in memory."""
+        if not email:
+            raise ValueError('No user given, use --user or a user column')
+        if email not in self.user_ids:
+            user = get_user_model().objects.filter(email=email).first()
+            if user is None:
+                raise ValueError(f'Unknown user {email}')
+            self.user_ids[email] = user.id
+
+        return self.user_ids[email]
+
+    def _load_batch(self, rows, checkpoint, done):
+        """Insert a batch of rows in one transaction.
+
+        The checkpoint is saved in the same transaction, so it counts
+        exactly the rows committed.
+        """
+        with transaction.atomic():
+            tag_ids = self._resolve_attrs(Tag, rows, 'tags')
+            ingredient_ids = self._resolve_attrs(
+                Ingredient,
+                rows,
+                'ingredients',
+            )
+            recipe_ids = self._insert_recipes(rows)
+            self._insert_through(
+                Recipe.tags.through, 'tag_id',
+                recipe_ids, rows, 'tags', tag_ids,
+            )
+            self._insert_through(
+                Recipe.ingredients.through, 'ingredient_id',
+                recipe_ids, rows, 'ingredients', ingredient_ids,
+            )
+            # Bulk loading skips model signals, so mark the data changed.
+            for user_id in {row['user_id'] for row in rows}:
+                bump_user_version(user_id)
+            if checkpoint:
+                ImportCheckpoint.objects.update_or_create(
+                    key=checkpoint,
+                    defaults={'rows': done},
+                )
+
+    def _resolve_attrs(self, model, rows, field):
+        """Return {(user_id, name): id} map, creating missing names."""
+        ids = self.attr_ids[model]
+        missing = {}
+        for row in rows:
+            for name in row[field]:
+                if (row['user_id'], name) not in ids:
+                    missing.setdefault(row['user_id'], set()).add(name)
+
+        for user_id, names in missing.items():
+            existing = model.objects.filter(user_id=user_id, name__in=names)
+            for name, pk in existing.values_list('name', 'id'):
+                ids[(user_id, name)] = pk
+            new = [name for name in names if (user_id, name) not in ids]
+            if not new:
+                continue
+            model.objects.bulk_create(
+                [model(user_id=user_id, name=name) for name in new],
+                ignore_conflicts=True,
+            )
+            created = model.objects.filter(user_id=user_id, name__in=new)
+            for name, pk in created.values_list('name', 'id'):
+                ids[(user_id, name)] = pk
+
+        return ids
+
+    def _insert_recipes(self, rows):
+        """Insert recipe rows and return their ids in order."""
+        if not self.use_copy:
+            recipes = [
+                Recipe(**{
+                    key: value for key, value in row.items()
+                    if key not in ('tags', 'ingredients')
+                })
+                for row in rows
+            ]
+            if connection.features.can_return_rows_from_bulk_insert:
+                Recipe.objects.bulk_create(recipes)
+            else:
+                # Without RETURNING bulk_create leaves the ids unset.
+                for recipe in recipes:
+                    recipe.save(force_insert=True)
+            return [recipe.id for recipe in recipes]
+
+        table = Recipe._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [table, len(rows)],
+            )
+            ids = [pk for pk, in cursor.fetchall()]
+            self._copy(cursor, table, [
+                'id', 'user_id', 'title', 'description',
+                'time_minutes', 'price', 'image_variants',
+                'image_variants_failed',
+            ], (
+                [
+                    pk, row['user_id'], row['title'], row['description'],
+                    row['time_minutes'], row['price'], '{}', False,
+                ]
+                for pk, row in zip(ids, rows)
+            ))
+
+        return ids
+
+    def _insert_through(self, through, target, recipe_ids, rows, field, ids):
+        """Insert recipe relation rows for a batch."""
+        pairs = [
+            (recipe_id, ids[(row['user_id'], name)])
+            for recipe_id, row in zip(recipe_ids, rows)
+            for name in row[field]
+        ]
+        if not pairs:
+            return
+        if not self.use_copy:
+            through.objects.bulk_create([
+                through(recipe_id=recipe_id, **{target: pk})
+                for recipe_id, pk in pairs
+            ])
+            return
+
+        with connection.cursor() as cursor:
+            self._copy(
+                cursor,
+                through._meta.db_table,
+                ['recipe_id', target],
+                pairs,
+            )
+
+    def _copy(self, cursor, table, columns, rows):
+        """Load rows into table with COPY FROM STDIN."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+        writer.writerows(rows)
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        cursor.copy_expert(
+            f'COPY {quote(table)} '
+            f'({", ".join(quote(column) for column in columns)}) '
+            'FROM STDIN WITH (FORMAT csv)',
+            buffer,
+        )
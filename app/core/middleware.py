@@ -0,0 +1,155 @@
+"""
+Response compression with gzip and brotli.
+"""
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def _get_setting(name):
+    """Return response compression setting."""
+    return settings.RESPONSE_COMPRESSION[name]
+
+
+def available_encodings():
+    """Return supported content codings, preferred first."""
+    return ['br', 'gzip'] if brotli else ['gzip']
+
+
+def select_encoding(accept_encoding):
+    """Return best supported coding of an Accept-Encoding header or None."""
+    qualities = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition('=')
+        if name.strip().lower() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in available_encodings():
+        quality = qualities.get(coding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+
+    return best
+
+
+def compressor(encoding):
+    """Return (compress, finish) functions of an incremental compressor."""
+    if encoding == 'br':
+        stream = brotli.Compressor(quality=_get_setting('BROTLI_QUALITY'))
+        return stream.process, stream.finish
+
+    # wbits 31 writes a gzip header with a zero mtime, so equal bodies
+    # compress to equal bytes.
+    stream = zlib.compressobj(_get_setting('GZIP_LEVEL'), zlib.DEFLATED, 31)
+    return stream.compress, stream.flush
+
+
+def compress(content, encoding):
+    """Return content compressed with encoding."""
+    process, finish = compressor(encoding)
+    return process(content) + finish()
+
+
+def compress_stream(chunks, encoding):
+    """Yield compressed chunks of an iterable of bytes."""
+    process, finish = compressor(encoding)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    """Compress responses for clients accepting gzip or brotli.
+
+    Bodies smaller than MIN_SIZE are sent as they are, streaming bodies
+    are compressed as they are sent. Compressed bodies of responses with
+    an ETag are cached next to the response cache, so a repeated read of
+    the same representation is not compressed again.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or \
+                'no-transform' in response.get('Cache-Control', ''):
+            return response
+        if not response.streaming and \
+                len(response.content) < _get_setting('MIN_SIZE'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = select_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content,
+                encoding,
+            )
+            del response['Content-Length']
+        else:
+            response.content = self._compressed_content(
+                request,
+                response,
+                encoding,
+            )
+            response['Content-Length'] = str(len(response.content))
+
+        # The compressed body differs byte for byte from the identity one.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+
+        return response
+
+    def _cache_key(self, request, response, encoding):
+        """Return cache key of the compressed body of a response."""
+        representation = '|'.join([
+            response['ETag'],
+            request.build_absolute_uri(),
+            response.get('Content-Type', ''),
+            encoding,
+        ])
+        digest = hashlib.sha256(representation.encode()).hexdigest()
+
+        return f'compressed:{digest}'
+
+    def _compressed_content(self, request, response, encoding):
+        """Return compressed body, cached for responses with an ETag."""
+        if not response.has_header('ETag') or response.status_code != 200:
+            return compress(response.content, encoding)
+
+        cache = caches[_get_setting('CACHE')]
+        key = self._cache_key(request, response, encoding)
+        content = cache.get(key)
+        if content is None:
+            content = compress(response.content, encoding)
+            cache.set(key, content, _get_setting('CACHE_TIMEOUT'))
+
+        return content
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """Merge tags and ingredients sharing a name for the same user."""
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, field in [('Tag', 'tags'), ('Ingredient', 'ingredients')]:
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, field).through
+        target = f'{model_name.lower()}_id'
+        duplicates = model.objects.values('user', 'name').annotate(
+            min_id=models.Min('id'),
+            count=models.Count('id'),
+        ).filter(count__gt=1)
+        for duplicate in duplicates:
+            keep_id = duplicate['min_id']
+            others = model.objects.filter(
+                user=duplicate['user'],
+                name=duplicate['name'],
+            ).exclude(id=keep_id)
+            other_ids = list(others.values_list('id', flat=True))
+            rows = through.objects.filter(**{f'{target}__in': other_ids})
+            recipe_ids = set(rows.values_list('recipe_id', flat=True))
+            recipe_ids -= set(through.objects.filter(
+                **{target: keep_id}
+            ).values_list('recipe_id', flat=True))
+            through.objects.bulk_create([
+                through(recipe_id=recipe_id, **{target: keep_id})
+                for recipe_id in recipe_ids
+            ])
+            rows.delete()
+            others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+from core.operations import (
+    CreateIndexOnline,
+    is_postgresql,
+)
+
+CONSTRAINTS = [
+    ('core_tag', 'unique_tag_name_per_user'),
+    ('core_ingredient', 'unique_ingredient_name_per_user'),
+]
+
+
+def add_constraints(apps, schema_editor):
+    """Turn the unique indexes into constraints without a table scan.
+
+    Other databases enforce uniqueness with the index alone.
+    """
+    if not is_postgresql(schema_editor):
+        return
+    for table, name in CONSTRAINTS:
+        schema_editor.execute(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" '
+            f'UNIQUE USING INDEX "{name}";'
+        )
+
+
+def drop_constraints(apps, schema_editor):
+    if not is_postgresql(schema_editor):
+        return
+    for table, name in CONSTRAINTS:
+        schema_editor.execute(
+            f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS "{name}";'
+        )
+
+
+class Migration(migrations.Migration):
+    # Build the unique indexes without blocking writes on live tables.
+    atomic = False
+
+    dependencies = [
+        ('core', '0006_merge_duplicate_attr_names'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                CreateIndexOnline(
+                    name=name,
+                    table=table,
+                    columns='"user_id", "name"',
+                    unique=True,
+                )
+                for table, name in CONSTRAINTS
+            ] + [
+                migrations.RunPython(add_constraints, drop_constraints),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='ingredient',
+                    constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_ingredient_name_per_user'),
+                ),
+                migrations.AddConstraint(
+                    model_name='tag',
+                    constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+                ),
+            ],
+        ),
+    ]
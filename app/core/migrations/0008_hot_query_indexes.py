@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+from core.operations import (
+    AddIndexOnline,
+    CreateIndexOnline,
+)
+
+
+def create_index_concurrently(table, column):
+    """Return operation indexing through table by its reverse side."""
+    return CreateIndexOnline(
+        name=f'{table}_{column}_recipe_idx',
+        table=table,
+        columns=f'"{column}", "recipe_id"',
+    )
+
+
+class Migration(migrations.Migration):
+    # Build indexes without blocking writes on live tables.
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_unique_attr_name_per_user'),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-id'], name='recipe_user_id_desc_idx'),
+        ),
+        create_index_concurrently('core_recipe_tags', 'tag_id'),
+        create_index_concurrently('core_recipe_ingredients', 'ingredient_id'),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:31
+
+from django.db import migrations
+
+from core.operations import (
+    CreateIndexOnline,
+    is_postgresql,
+)
+
+TABLES = ['core_tag', 'core_ingredient']
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Index names for trigram matching.
+
+    Trigram indexes need the pg_trgm and btree_gin contrib extensions and
+    are skipped where the server does not ship them.
+    """
+    if not is_postgresql(schema_editor):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT count(*) FROM pg_available_extensions '
+            "WHERE name IN ('pg_trgm', 'btree_gin')"
+        )
+        if cursor.fetchone()[0] < 2:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gin;')
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{table}_name_trgm_idx" '
+            f'ON "{table}" USING gin ("user_id", "name" gin_trgm_ops);'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if not is_postgresql(schema_editor):
+        return
+    for table in TABLES:
+        schema_editor.execute(
+            f'DROP INDEX CONCURRENTLY IF EXISTS "{table}_name_trgm_idx";'
+        )
+
+
+class Migration(migrations.Migration):
+    # Build indexes without blocking writes on live tables.
+    atomic = False
+
+    dependencies = [
+        ('core', '0011_recipe_search_vector'),
+    ]
+
+    operations = [
+        # Case-insensitive prefix matching.
+        CreateIndexOnline(
+            name=f'{table}_name_prefix_idx',
+            table=table,
+            columns='"user_id", upper("name") text_pattern_ops',
+            postgresql_only=True,
+        )
+        for table in TABLES
+    ] + [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+from core.operations import (
+    AddIndexOnline,
+)
+
+
+class Migration(migrations.Migration):
+    # Build indexes without blocking writes on live tables.
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_attr_name_autocomplete_indexes'),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'price', 'id'], name='recipe_user_price_id_idx'),
+        ),
+        AddIndexOnline(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'time_minutes', 'id'], name='recipe_user_time_id_idx'),
+        ),
+        AddIndexOnline(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'title', 'id'], name='recipe_user_title_id_idx'),
+        ),
+    ]
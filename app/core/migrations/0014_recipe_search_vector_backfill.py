@@ -0,0 +1,70 @@
+# Generated by Django 3.2.25 on 2026-10-18 06:12
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+from core.operations import (
+    CreateIndexOnline,
+    is_postgresql,
+)
+
+# Rows updated per statement, so each batch holds its row locks briefly.
+BACKFILL_BATCH_SIZE = 1000
+
+BACKFILL = '''
+UPDATE core_recipe SET title = title
+WHERE id > %s AND id <= %s AND search_vector IS NULL;
+'''
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Fill search vectors of existing recipes in id ranges.
+
+    The trigger of 0011 computes the vector on update, and keeps it
+    current for rows written while this runs.
+    """
+    if not is_postgresql(schema_editor):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT max(id) FROM core_recipe;')
+        last_id = cursor.fetchone()[0] or 0
+
+    for start in range(0, last_id, BACKFILL_BATCH_SIZE):
+        schema_editor.execute(
+            BACKFILL,
+            [start, start + BACKFILL_BATCH_SIZE],
+        )
+
+
+class Migration(migrations.Migration):
+    # Commit every backfill batch and build the index without blocking
+    # writes on the live table.
+    atomic = False
+
+    dependencies = [
+        ('core', '0013_recipe_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_search_vector,
+            migrations.RunPython.noop,
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                CreateIndexOnline(
+                    name='recipe_search_vector_idx',
+                    table='core_recipe',
+                    columns='"search_vector"',
+                    using='gin',
+                    postgresql_only=True,
+                ),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='recipe',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_idx'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 04:29
+
+from django.db import migrations, models
+
+from core.operations import (
+    AddIndexOnline,
+)
+
+
+class Migration(migrations.Migration):
+    # Build the index without blocking writes on the live table.
+    atomic = False
+
+    dependencies = [
+        ('core', '0015_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants_failed',
+            field=models.BooleanField(default=False),
+        ),
+        AddIndexOnline(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('image_variants', {}), ('image_variants_failed', False), ('image__isnull', False), models.Q(('image', ''), _negated=True)), fields=['id'], name='recipe_pending_variants_idx'),
+        ),
+    ]
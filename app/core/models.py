@@ -5,6 +5,8 @@ import uuid
 import os
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -13,6 +15,14 @@ from django.contrib.auth.models import (
 )
 
 
+# Recipes with an image whose variants are still to be generated.
+PENDING_IMAGE_VARIANTS = (
+    models.Q(image_variants={}, image_variants_failed=False)
+    & models.Q(image__isnull=False)
+    & ~models.Q(image='')
+)
+
+
 def recipe_image_file_path(instance, filename):
     """Generate file path for a new image."""
     ext = os.path.splitext(filename)[1]
@@ -21,6 +31,15 @@ def recipe_image_file_path(instance, filename):
     return os.path.join('uploads', 'recipe', filename)
 
 
+def image_blob_file_path(digest, filename):
+    """Generate content addressed file path for an image."""
+    ext = os.path.splitext(filename)[1].lower()
+
+    return os.path.join(
+        'uploads', 'recipe', 'blobs', digest[:2], digest[2:4], f'{digest}{ext}'
+    )
+
+
 class UserManager(BaseUserManager):
     """Manager for users."""
 
@@ -69,11 +88,67 @@ class Recipe(models.Model):
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Set when variants of the image cannot be generated, so the image
+    # is not tried again until it is replaced.
+    image_variants_failed = models.BooleanField(default=False)
+    # Weighted title and description lexemes, kept up to date by a
+    # PostgreSQL trigger so bulk loads are covered too.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-id'],
+                name='recipe_user_id_desc_idx',
+            ),
+            models.Index(
+                fields=['user', 'price', 'id'],
+                name='recipe_user_price_id_idx',
+            ),
+            models.Index(
+                fields=['user', 'time_minutes', 'id'],
+                name='recipe_user_time_id_idx',
+            ),
+            models.Index(
+                fields=['user', 'title', 'id'],
+                name='recipe_user_title_id_idx',
+            ),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx',
+            ),
+            models.Index(
+                fields=['id'],
+                condition=PENDING_IMAGE_VARIANTS,
+                name='recipe_pending_variants_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class ImageBlob(models.Model):
+    """Image file stored once per content and shared by recipes."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.ImageField(max_length=255, db_index=True)
+    size = models.PositiveIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.sha256
+
+
+class ImportCheckpoint(models.Model):
+    """Number of rows of an import input committed so far."""
+    key = models.TextField(unique=True)
+    rows = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.key
+
+
 class Tag(models.Model):
     """Tag for filtering recipes."""
     name = models.CharField(max_length=255)
@@ -82,6 +157,14 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user',
+            ),
+        ]
+
     def __str__(self):
         return str(self.name)
 
@@ -94,5 +177,13 @@ class Ingredient(models.Model):
     )
     name = models.CharField(max_length=255)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_name_per_user',
+            ),
+        ]
+
     def __str__(self):
-        return str(self.name)
\ No newline at end of file
+        return str(self.name)
@@ -0,0 +1,121 @@
+"""
+Migration operations building indexes without blocking writes.
+"""
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db.migrations.operations import AddIndex
+from django.db.migrations.operations.base import Operation
+
+
+def is_postgresql(schema_editor):
+    """Return whether a migration runs against PostgreSQL."""
+    return schema_editor.connection.vendor == 'postgresql'
+
+
+class CreateIndexOnline(Operation):
+    """Create an index from SQL, CONCURRENTLY on PostgreSQL.
+
+    Migrations using it must set atomic = False. Other databases build
+    the index normally, or skip it when postgresql_only is set because
+    the definition is PostgreSQL specific.
+    """
+    reduces_to_sql = False
+
+    def __init__(self, name, table, columns, unique=False, using='',
+                 postgresql_only=False):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.unique = unique
+        self.using = using
+        self.postgresql_only = postgresql_only
+
+    def deconstruct(self):
+        kwargs = {
+            'name': self.name,
+            'table': self.table,
+            'columns': self.columns,
+            'unique': self.unique,
+            'using': self.using,
+            'postgresql_only': self.postgresql_only,
+        }
+        return self.__class__.__name__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def _applies(self, schema_editor):
+        """Return whether the index is built on this database."""
+        return is_postgresql(schema_editor) or not self.postgresql_only
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if not self._applies(schema_editor):
+            return
+        if is_postgresql(schema_editor):
+            self._drop_invalid(schema_editor)
+        unique = 'UNIQUE ' if self.unique else ''
+        concurrently = ' CONCURRENTLY' if is_postgresql(schema_editor) else ''
+        using = f' USING {self.using}' if self.using else ''
+        schema_editor.execute(
+            f'CREATE {unique}INDEX{concurrently} IF NOT EXISTS '
+            f'"{self.name}" ON "{self.table}"{using} ({self.columns});'
+        )
+
+    def _drop_invalid(self, schema_editor):
+        """Drop the index left INVALID by a failed concurrent build.
+
+        IF NOT EXISTS would otherwise keep it on a rerun, and PostgreSQL
+        neither uses it for queries nor accepts it for a constraint.
+        """
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT NOT indisvalid FROM pg_index '
+                'WHERE indexrelid = to_regclass(%s);',
+                [f'"{self.name}"'],
+            )
+            row = cursor.fetchone()
+        if row and row[0]:
+            schema_editor.execute(
+                f'DROP INDEX CONCURRENTLY IF EXISTS "{self.name}";'
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if not self._applies(schema_editor):
+            return
+        concurrently = ' CONCURRENTLY' if is_postgresql(schema_editor) else ''
+        schema_editor.execute(
+            f'DROP INDEX{concurrently} IF EXISTS "{self.name}";'
+        )
+
+    def describe(self):
+        return f'Create index {self.name} on {self.table}'
+
+
+class AddIndexOnline(AddIndexConcurrently):
+    """Add a model index, CONCURRENTLY on PostgreSQL.
+
+    Other databases have no concurrent builds and add the index normally.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if is_postgresql(schema_editor):
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state,
+            )
+        else:
+            AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state,
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if is_postgresql(schema_editor):
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state,
+            )
+        else:
+            AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state,
+            )
@@ -0,0 +1,101 @@
+"""
+Fast JSON and MessagePack renderers.
+"""
+from decimal import Decimal
+
+from rest_framework.renderers import (
+    BaseRenderer,
+    JSONRenderer,
+)
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Render JSON with orjson when installed, else like JSONRenderer.
+
+    Types orjson does not encode natively, including Decimal, datetimes
+    and lazy strings, go through the DRF encoder, so the output matches
+    JSONRenderer byte for byte. Output orjson cannot reproduce (ASCII
+    escaping, indents other than 2, non strict floats, integers wider
+    than 64 bits) is rendered by JSONRenderer. Floats in exponent form
+    are written without a plus sign and zero padding, e.g. 1e16.
+    """
+    options = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    ) if orjson else 0
+
+    def _orjson_options(self, indent):
+        """Return orjson options for indent or None if not supported."""
+        if orjson is None or self.ensure_ascii or not self.strict:
+            return None
+        if indent is None:
+            return self.options if self.compact else None
+        if indent == 2:
+            return self.options | orjson.OPT_INDENT_2
+
+        return None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        options = self._orjson_options(indent)
+        if options is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=options,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape like JSONRenderer so the output is a javascript subset.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028',
+        ).replace(
+            '\u2029'.encode(), b'\\u2029',
+        )
+
+
+def msgpack_default(obj):
+    """Encode types msgpack does not support like the JSON output.
+
+    Decimal values and integers wider than 64 bits are written as strings
+    to keep their precision.
+    """
+    if isinstance(obj, (Decimal, int)):
+        return str(obj)
+
+    return JSONEncoder().default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Render MessagePack for clients sending Accept: application/msgpack.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        assert msgpack is not None, \
+            'MessagePackRenderer requires msgpack to be installed'
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=msgpack_default, use_bin_type=True)
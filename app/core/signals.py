@@ -0,0 +1,55 @@
+"""
+Signal handlers for core models.
+"""
+from django.conf import settings
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_token
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.versions import bump_user_version
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Drop cached authentication for a deleted token."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached authentication when a user changes."""
+    if created:
+        return
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    for key in keys:
+        invalidate_token(key)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def bump_version_on_change(sender, instance, **kwargs):
+    """Bump data version of the owner of a changed object."""
+    bump_user_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_version_on_m2m_change(sender, instance, action, **kwargs):
+    """Bump data version when recipe tags or ingredients change."""
+    if action.startswith('post_'):
+        bump_user_version(instance.user_id)
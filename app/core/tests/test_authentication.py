@@ -0,0 +1,175 @@
+"""
+Tests for cached token authentication.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import (
+    LocalLRUCache,
+    local_cache,
+    token_cache_key,
+)
+
+ME_URL = reverse('user:me')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class LocalLRUCacheTests(SimpleTestCase):
+    """Tests the in-process LRU cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test oldest unused entry is evicted when full."""
+        lru = LocalLRUCache(max_size=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+
+    @patch('core.authentication.time.monotonic')
+    def test_entry_expires(self, patched_monotonic):
+        """Test entries expire after the timeout."""
+        patched_monotonic.return_value = 100
+        lru = LocalLRUCache(max_size=2, timeout=5)
+        lru.set('a', 1)
+
+        patched_monotonic.return_value = 104
+        self.assertEqual(lru.get('a'), 1)
+        patched_monotonic.return_value = 105
+        self.assertIsNone(lru.get('a'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Tests authenticating with cached tokens."""
+
+    def setUp(self):
+        local_cache.clear()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def _token_queries(self, url):
+        """Return response and number of authtoken queries for GET."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        queries = [
+            q for q in ctx.captured_queries if 'authtoken_token' in q['sql']
+        ]
+
+        return res, len(queries)
+
+    def test_token_cached_after_first_request(self):
+        """Test repeated requests skip the token table."""
+        res, first = self._token_queries(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res, second = self._token_queries(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(first, 1)
+        self.assertEqual(second, 0)
+
+    def test_shared_cache_used_when_local_missing(self):
+        """Test the shared cache is used when the local entry is gone."""
+        self.client.get(ME_URL)
+        local_cache.clear()
+
+        res, count = self._token_queries(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(count, 0)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_invalid_token_rejected(self):
+        """Test unknown tokens are rejected and not cached."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res, first = self._token_queries(ME_URL)
+        res, second = self._token_queries(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(second, 1)
+
+    def test_deleted_token_invalidated(self):
+        """Test deleting a token invalidates the cached entry."""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        """Test deactivating a user invalidates the cached entry."""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates(self):
+        """Test changing the password invalidates the cached entry."""
+        self.client.get(ME_URL)
+        self.user.set_password('newpass123')
+        self.user.save()
+
+        res, count = self._token_queries(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(count, 1)
+
+    def test_update_user_not_leaked_into_cache(self):
+        """Test updating the user through the API refreshes the entry."""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'Updated'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'Updated')
+
+    def test_password_hash_not_cached(self):
+        """Test the cache holds no password hash or pickled models."""
+        self.client.get(ME_URL)
+
+        payload = cache.get(token_cache_key(self.token.key))
+
+        self.assertEqual(set(payload), {'token', 'user'})
+        self.assertNotIn(self.user.password, repr(payload))
+        self.assertEqual(payload['user'][:2], [self.user.id, self.user.email])
+
+    def test_update_from_cached_user_keeps_other_fields(self):
+        """Test saving the cached user only writes the loaded fields."""
+        self.user.last_login = timezone.now()
+        self.user.save()
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'password': 'newpass123'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user = get_user_model().objects.get(id=self.user.id)
+        self.assertTrue(user.check_password('newpass123'))
+        self.assertEqual(user.last_login, self.user.last_login)
@@ -1,12 +1,29 @@
 """Tests django commands."""
-
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+)
+
+from core.management.commands.import_recipes import Command
+from core.models import (
+    ImportCheckpoint,
+    Recipe,
+    Tag,
+    Ingredient,
+)
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -29,4 +46,161 @@ class CommandTests(SimpleTestCase):
         call_command('wait_for_db')
  
         self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
\ No newline at end of file
+        patched_check.assert_called_with(databases=['default'])
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Tests import_recipes command."""
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def _write(self, name, content):
+        """Write input file and return its path."""
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _ndjson(self, count, start=0):
+        """Return NDJSON input with count recipes."""
+        return ''.join(
+            json.dumps({
+                'title': f'Recipe {i}',
+                'time_minutes': 10,
+                'price': '2.50',
+                'tags': ['Dinner', f'Tag {i % 2}'],
+                'ingredients': [{'name': 'Salt'}],
+            }) + '\n'
+            for i in range(start, start + count)
+        )
+
+    def _import(self, path, *args):
+        """Run the command and return its output."""
+        out = StringIO()
+        call_command(
+            'import_recipes', path, '--user', self.user.email, *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def _assert_imported(self, count):
+        """Assert count recipes with their relations were imported."""
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), count)
+        self.assertEqual(
+            sorted(Tag.objects.values_list('name', flat=True)),
+            ['Dinner', 'Tag 0', 'Tag 1'],
+        )
+        self.assertEqual(Ingredient.objects.count(), 1)
+        for recipe in recipes:
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_import_ndjson_with_copy(self):
+        """Test importing NDJSON in batches with COPY."""
+        path = self._write('recipes.ndjson', self._ndjson(5))
+
+        out = self._import(path, '--batch-size', '2')
+
+        self._assert_imported(5)
+        self.assertIn('recipes/s', out)
+        recipe = Recipe.objects.get(title='Recipe 3')
+        self.assertEqual(recipe.price, Decimal('2.50'))
+        self.assertEqual(recipe.description, '')
+
+    def test_import_with_bulk_create(self):
+        """Test importing with the bulk_create fallback."""
+        path = self._write('recipes.ndjson', self._ndjson(3))
+
+        self._import(path, '--no-copy')
+
+        self._assert_imported(3)
+
+    def test_import_csv(self):
+        """Test importing CSV with separated names."""
+        path = self._write('recipes.csv', (
+            'title,description,time_minutes,price,tags,ingredients\n'
+            'Pie,"Sweet, warm",40,5.25,Dinner|Tag 0,Salt\n'
+            'Soup,,20,3.00,Dinner|Tag 1,Salt\n'
+        ))
+
+        self._import(path)
+
+        self._assert_imported(2)
+        pie = Recipe.objects.get(title='Pie')
+        self.assertEqual(pie.description, 'Sweet, warm')
+        self.assertEqual(pie.time_minutes, 40)
+
+    def test_existing_names_reused(self):
+        """Test existing tags are reused instead of duplicated."""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        path = self._write('recipes.ndjson', self._ndjson(2))
+
+        self._import(path)
+
+        self.assertEqual(Tag.objects.filter(name='Dinner').count(), 1)
+        self.assertEqual(tag.recipe_set.count(), 2)
+
+    def test_resume_from_checkpoint(self):
+        """Test rerunning resumes after the last committed batch."""
+        path = self._write('recipes.ndjson', self._ndjson(5))
+        ImportCheckpoint.objects.create(key=path, rows=3)
+
+        out = self._import(path, '--batch-size', '2')
+
+        self.assertIn('Resuming after 3 rows', out)
+        titles = Recipe.objects.values_list('title', flat=True)
+        self.assertEqual(sorted(titles), ['Recipe 3', 'Recipe 4'])
+        self.assertEqual(ImportCheckpoint.objects.get(key=path).rows, 5)
+
+    def test_checkpoint_commits_with_batch(self):
+        """Test a failed batch rolls back its rows and its checkpoint."""
+        path = self._write('recipes.ndjson', self._ndjson(5))
+        insert_through = Command._insert_through
+        calls = []
+
+        def fail_second_batch(command, *args):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError('Lost connection')
+            insert_through(command, *args)
+
+        with patch.object(Command, '_insert_through', fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                self._import(path, '--batch-size', '2')
+
+        self.assertEqual(Recipe.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get(key=path).rows, 2)
+
+        self._import(path, '--batch-size', '2')
+
+        titles = Recipe.objects.values_list('title', flat=True)
+        self.assertEqual(sorted(titles), [f'Recipe {i}' for i in range(5)])
+
+    def test_invalid_row(self):
+        """Test invalid rows stop the import with their number."""
+        path = self._write(
+            'recipes.ndjson',
+            self._ndjson(1) + '{"title": "No time"}\n',
+        )
+
+        with self.assertRaisesMessage(CommandError, 'Invalid row 2'):
+            self._import(path)
+
+    def test_malformed_json_row(self):
+        """Test malformed NDJSON lines stop the import with their number."""
+        path = self._write(
+            'recipes.ndjson',
+            self._ndjson(2) + '{"title": \n' + '[1, 2]\n',
+        )
+
+        with self.assertRaisesMessage(CommandError, 'Invalid row 3'):
+            self._import(path)
+        path = self._write('list.ndjson', '[1, 2]\n')
+        with self.assertRaisesMessage(CommandError, 'Invalid row 1'):
+            self._import(path)
@@ -0,0 +1,217 @@
+"""
+Tests for response compression.
+"""
+import gzip
+import json
+from unittest.mock import patch
+
+import brotli
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.http import (
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import middleware
+from core.middleware import (
+    CompressionMiddleware,
+    select_encoding,
+)
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+BODY = b'{"title": "Sample recipe"}' * 100
+
+
+class SelectEncodingTests(SimpleTestCase):
+    """Tests negotiating the content coding."""
+
+    def test_select_encoding(self):
+        """Test the best accepted supported coding is selected."""
+        cases = [
+            ('gzip, deflate, br', 'br'),
+            ('gzip', 'gzip'),
+            ('br;q=0, gzip', 'gzip'),
+            ('gzip;q=0.5, br;q=0.4', 'gzip'),
+            ('*', 'br'),
+            ('*;q=0, gzip', 'gzip'),
+            ('GZIP; Q=1', 'gzip'),
+            ('gzip;q=0', None),
+            ('identity, deflate', None),
+            ('', None),
+        ]
+        for header, expected in cases:
+            self.assertEqual(select_encoding(header), expected, header)
+
+    def test_gzip_only_without_brotli(self):
+        """Test brotli is not offered when it is not installed."""
+        with patch('core.middleware.brotli', None):
+            self.assertEqual(select_encoding('br, gzip'), 'gzip')
+            self.assertIsNone(select_encoding('br'))
+
+
+@override_settings(RESPONSE_COMPRESSION={
+    'MIN_SIZE': 200,
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'CACHE': 'responses',
+    'CACHE_TIMEOUT': 60,
+})
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Tests compressing responses."""
+
+    def setUp(self):
+        caches['responses'].clear()
+
+    def _get(self, response, accept_encoding='gzip, br'):
+        """Return response passed through the middleware."""
+        request = RequestFactory().get(
+            '/api/recipe/',
+            HTTP_ACCEPT_ENCODING=accept_encoding,
+        )
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_gzip(self):
+        """Test body is gzip compressed with matching headers."""
+        res = self._get(HttpResponse(BODY), 'gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(res.content), BODY)
+
+    def test_brotli(self):
+        """Test brotli is preferred when accepted."""
+        res = self._get(HttpResponse(BODY))
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(res.content), BODY)
+
+    def test_small_body_not_compressed(self):
+        """Test bodies below the threshold are sent as they are."""
+        res = self._get(HttpResponse(b'{}'))
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertFalse(res.has_header('Vary'))
+        self.assertEqual(res.content, b'{}')
+
+    def test_not_accepted(self):
+        """Test identity responses still vary on Accept-Encoding."""
+        res = self._get(HttpResponse(BODY), '')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res.content, BODY)
+
+    def test_already_encoded(self):
+        """Test encoded or no-transform responses are left alone."""
+        encoded = HttpResponse(BODY)
+        encoded['Content-Encoding'] = 'identity'
+        no_transform = HttpResponse(BODY)
+        no_transform['Cache-Control'] = 'no-transform'
+
+        self.assertEqual(self._get(encoded).content, BODY)
+        self.assertEqual(self._get(no_transform).content, BODY)
+
+    def test_streaming(self):
+        """Test streaming bodies are compressed while streamed."""
+        chunks = [b'{"id": %d}\n' % n for n in range(1000)]
+        res = self._get(StreamingHttpResponse(iter(chunks)), 'gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertFalse(res.has_header('Content-Length'))
+        self.assertEqual(
+            gzip.decompress(b''.join(res.streaming_content)),
+            b''.join(chunks),
+        )
+
+    def test_compressed_body_cached_by_etag(self):
+        """Test a repeated response with the same ETag is not recompressed.
+        """
+        def response(etag):
+            res = HttpResponse(BODY, content_type='application/json')
+            res['ETag'] = etag
+            return res
+
+        with patch.object(
+            middleware,
+            'compress',
+            wraps=middleware.compress,
+        ) as mock_compress:
+            first = self._get(response('W/"v1"'))
+            second = self._get(response('W/"v1"'))
+            gzipped = self._get(response('W/"v1"'), 'gzip')
+            changed = self._get(response('W/"v2"'))
+
+        self.assertEqual(mock_compress.call_count, 3)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(brotli.decompress(changed.content), BODY)
+        self.assertEqual(gzip.decompress(gzipped.content), BODY)
+
+    def test_strong_etag_made_weak(self):
+        """Test strong ETags are weakened for compressed bodies."""
+        res = HttpResponse(BODY)
+        res['ETag'] = '"abc"'
+
+        self.assertEqual(self._get(res)['ETag'], 'W/"abc"')
+
+
+class CompressionApiTests(TestCase):
+    """Tests compressed recipe API responses."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=self.user,
+                title=f'Recipe {n}',
+                time_minutes=10,
+                price='2.50',
+            )
+            for n in range(50)
+        ])
+
+    def test_list_compressed(self):
+        """Test list responses are compressed and keep their ETag."""
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        data = json.loads(gzip.decompress(res.content))
+        self.assertEqual(len(data['results']), 50)
+
+        cached = self.client.get(
+            RECIPES_URL,
+            HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=res['ETag'],
+        )
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_export_compressed(self):
+        """Test streamed exports are compressed."""
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='br')
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        lines = brotli.decompress(
+            b''.join(res.streaming_content)
+        ).splitlines()
+        self.assertEqual(len(lines), 50)
@@ -1,9 +1,11 @@
 """
 Tests for models.
 """
+from unittest import skipUnless
 from unittest.mock import patch
 from decimal import Decimal
 
+from django.db import IntegrityError, connection
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -78,6 +80,24 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(recipe), recipe.title)
 
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+    def test_recipe_search_vector_set_on_bulk_insert(self):
+        """Test the search vector is filled in by the database."""
+        user = create_user()
+        models.Recipe.objects.bulk_create([
+            models.Recipe(
+                user=user,
+                title='Lentil soup',
+                time_minutes=5,
+                price=Decimal('5.50'),
+                description='Hearty',
+            ),
+        ])
+
+        recipe = models.Recipe.objects.get(user=user)
+        self.assertIn("'lentil':1A", recipe.search_vector)
+        self.assertIn("'hearti':3B", recipe.search_vector)
+
     def test_create_tag(self):
         """Test creating tag is successfull."""
         user = create_user()
@@ -88,6 +108,56 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(tag), tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name."""
+        user = create_user()
+        models.Tag.objects.create(user=user, name='Vegan')
+        other_user = create_user(email='other@example.com')
+        models.Tag.objects.create(user=other_user, name='Vegan')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Vegan')
+
+    def test_ingredient_name_unique_per_user(self):
+        """Test a user cannot have two ingredients with the same name."""
+        user = create_user()
+        models.Ingredient.objects.create(user=user, name='Salt')
+
+        with self.assertRaises(IntegrityError):
+            models.Ingredient.objects.create(user=user, name='Salt')
+
+    def test_hot_query_indexes(self):
+        """Test composite indexes for per-user queries exist."""
+        expected = {
+            'core_recipe': ['user_id', 'id'],
+            'core_tag': ['user_id', 'name'],
+            'core_ingredient': ['user_id', 'name'],
+            'core_recipe_tags': ['tag_id', 'recipe_id'],
+            'core_recipe_ingredients': ['ingredient_id', 'recipe_id'],
+        }
+        with connection.cursor() as cursor:
+            for table, columns in expected.items():
+                constraints = connection.introspection.get_constraints(
+                    cursor,
+                    table,
+                )
+                indexed = [
+                    c['columns'] for c in constraints.values()
+                    if c['index'] or c['unique']
+                ]
+                self.assertIn(columns, indexed, table)
+
+    def test_recipe_sort_indexes(self):
+        """Test keyset indexes for each recipe sort field exist."""
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor,
+                'core_recipe',
+            )
+        indexed = [c['columns'] for c in constraints.values() if c['index']]
+        for field in ['price', 'time_minutes', 'title']:
+            self.assertIn(['user_id', field, 'id'], indexed)
+
     @patch('core.models.uuid.uuid4')
     def test_recipe_file_name_uuid(self, mock_uuid):
         """Test generating image path."""
@@ -96,3 +166,13 @@ class ModelTests(TestCase):
         file_path = models.recipe_image_file_path(None, 'example.jpg')
 
         self.assertEqual(file_path, f'uploads/recipe/{uuid}.jpg')
+
+    def test_image_blob_file_path(self):
+        """Test generating content addressed image path."""
+        digest = 'ab' * 32
+        file_path = models.image_blob_file_path(digest, 'Example.JPG')
+
+        self.assertEqual(
+            file_path,
+            f'uploads/recipe/blobs/ab/ab/{digest}.jpg',
+        )
@@ -0,0 +1,205 @@
+"""
+Tests for the fast JSON renderer and parser.
+"""
+import datetime
+import io
+import json
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from unittest.mock import patch
+
+import msgpack
+
+from django.contrib.auth import get_user_model
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+)
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.parsers import (
+    FastJSONParser,
+    MessagePackParser,
+)
+from core.renderers import (
+    FastJSONRenderer,
+    MessagePackRenderer,
+)
+
+ME_URL = reverse('user:me')
+
+SAMPLE = OrderedDict([
+    ('price', Decimal('5.25')),
+    ('prices', [Decimal('0.10'), Decimal('1E+2')]),
+    ('created', datetime.datetime(2021, 5, 1, 12, 30, 15, 123456,
+                                  tzinfo=timezone.utc)),
+    ('local', datetime.datetime(2021, 5, 1, 12, 30)),
+    ('day', datetime.date(2021, 5, 1)),
+    ('time', datetime.time(8, 15, 30)),
+    ('duration', datetime.timedelta(minutes=90)),
+    ('label', gettext_lazy('This field is required.')),
+    ('uuid', uuid.UUID('12345678-1234-5678-1234-567812345678')),
+    ('text', 'Crème brûlée \u2028 line \u2029 "quoted" \\ </script>'),
+    ('empty', {}),
+    ('nested', {1: [True, False, None], 'tuple': (1, 2.5)}),
+    ('big', 2 ** 70),
+])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Tests rendering JSON with FastJSONRenderer."""
+
+    def _assert_same(self, data, media_type=None, context=None):
+        """Assert fast and DRF renderers produce identical bytes."""
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type, context),
+            JSONRenderer().render(data, media_type, context),
+        )
+
+    def test_output_matches_json_renderer(self):
+        """Test Decimal, datetimes and lazy strings render identically."""
+        self._assert_same(SAMPLE)
+        self._assert_same([SAMPLE, SAMPLE])
+
+    def test_indent_matches_json_renderer(self):
+        """Test indented output renders identically."""
+        self._assert_same(SAMPLE, 'application/json; indent=2')
+        self._assert_same(SAMPLE, 'application/json; indent=4')
+        self._assert_same(SAMPLE, None, {'indent': 4})
+
+    def test_none_renders_empty(self):
+        """Test rendering None returns no content."""
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_unsupported_type_raises(self):
+        """Test objects the encoder cannot handle raise TypeError."""
+        with self.assertRaises(TypeError):
+            FastJSONRenderer().render({'value': object()})
+
+    def test_fallback_without_orjson(self):
+        """Test rendering falls back to the stdlib without orjson."""
+        with patch('core.renderers.orjson', None):
+            self._assert_same(SAMPLE)
+
+
+class FastJSONParserTests(SimpleTestCase):
+    """Tests parsing JSON with FastJSONParser."""
+
+    def _parse(self, parser, body, encoding='utf-8'):
+        """Parse body with parser."""
+        return parser.parse(
+            io.BytesIO(body),
+            'application/json',
+            {'encoding': encoding},
+        )
+
+    def test_parse_matches_json_parser(self):
+        """Test documents parse to the same values."""
+        body = JSONRenderer().render(SAMPLE)
+
+        self.assertEqual(
+            self._parse(FastJSONParser(), body),
+            self._parse(JSONParser(), body),
+        )
+
+    def test_invalid_json_error(self):
+        """Test invalid documents raise the JSONParser error."""
+        for body in (b'{"title": ', b'NaN', b'{"value": Infinity}'):
+            with self.assertRaises(ParseError) as fast:
+                self._parse(FastJSONParser(), body)
+            with self.assertRaises(ParseError) as stdlib:
+                self._parse(JSONParser(), body)
+            self.assertEqual(str(fast.exception), str(stdlib.exception))
+
+    def test_rejected_by_orjson_parsed_again(self):
+        """Test input only the stdlib accepts is still parsed."""
+        body = b'{"title": "\\ud800"}'
+
+        self.assertEqual(
+            self._parse(FastJSONParser(), body),
+            {'title': '\ud800'},
+        )
+
+    def test_other_encodings(self):
+        """Test non UTF-8 bodies are decoded like JSONParser."""
+        body = '{"title": "Crème"}'.encode('utf-16')
+
+        self.assertEqual(
+            self._parse(FastJSONParser(), body, encoding='utf-16'),
+            {'title': 'Crème'},
+        )
+
+
+class MessagePackTests(SimpleTestCase):
+    """Tests the MessagePack renderer and parser."""
+
+    def test_values_match_json(self):
+        """Test values are encoded like JSON with Decimal as strings."""
+        data = msgpack.unpackb(MessagePackRenderer().render(SAMPLE),
+                               strict_map_key=False)
+        expected = json.loads(JSONRenderer().render(SAMPLE))
+
+        self.assertEqual(data['price'], '5.25')
+        self.assertEqual(data['prices'], ['0.10', '1E+2'])
+        self.assertEqual(data['big'], str(2 ** 70))
+        for key in ('created', 'local', 'day', 'time', 'duration', 'label',
+                    'uuid', 'text', 'empty'):
+            self.assertEqual(data[key], expected[key])
+        self.assertEqual(data['nested'], {1: [True, False, None],
+                                          'tuple': [1, 2.5]})
+
+    def test_none_renders_empty(self):
+        """Test rendering None returns no content."""
+        self.assertEqual(MessagePackRenderer().render(None), b'')
+
+    def test_parse(self):
+        """Test MessagePack bodies are parsed."""
+        body = msgpack.packb({'title': 'Crème', 'tags': [{'name': 'Vegan'}]})
+
+        data = MessagePackParser().parse(io.BytesIO(body))
+
+        self.assertEqual(data, {'title': 'Crème', 'tags': [{'name': 'Vegan'}]})
+
+    def test_parse_error(self):
+        """Test malformed bodies raise ParseError."""
+        for body in (b'\xc1', b'\x92\x01', b'\x91\x01\x02', b'\xa1\xff'):
+            with self.assertRaises(ParseError):
+                MessagePackParser().parse(io.BytesIO(body))
+
+
+class FastJSONApiTests(TestCase):
+    """Tests the API uses the fast JSON classes by default."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_json_request_and_response(self):
+        """Test JSON bodies are parsed and rendered by the fast classes."""
+        res = self.client.patch(
+            ME_URL,
+            {'name': 'Crème \u2028 brûlée'},
+            format='json',
+        )
+
+        self.assertIsInstance(res.accepted_renderer, FastJSONRenderer)
+        self.assertEqual(
+            res.content,
+            JSONRenderer().render({
+                'email': 'test@example.com',
+                'name': 'Crème \u2028 brûlée',
+            }),
+        )
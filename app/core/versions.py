@@ -0,0 +1,41 @@
+"""
+Per-user data versions for conditional requests and caching.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def _version_key(user_id):
+    """Return cache key for the data version of a user."""
+    return f'data-version:{user_id}'
+
+
+def get_user_version(user_id):
+    """Return current data version for a user without touching the db."""
+    cache = caches[settings.DATA_VERSION_CACHE]
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+
+    return version
+
+
+def _set_new_version(user_id):
+    """Replace the data version of a user with a new random value."""
+    cache = caches[settings.DATA_VERSION_CACHE]
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+
+
+def bump_user_version(user_id):
+    """Mark data of a user as changed.
+
+    The version changes immediately and again on commit, so a version read
+    while the transaction was open is never paired with committed data.
+    """
+    _set_new_version(user_id)
+    transaction.on_commit(lambda: _set_new_version(user_id))
@@ -0,0 +1,99 @@
+"""
+Content addressed storage of recipe images.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import (
+    IntegrityError,
+    transaction,
+)
+from django.db.models import F
+
+from core.models import (
+    ImageBlob,
+    image_blob_file_path,
+)
+from recipe.images import (
+    delete_variants,
+    variant_path,
+)
+
+
+def content_addressed():
+    """Return whether new recipe images are stored by content."""
+    return settings.RECIPE_IMAGE_STORAGE == 'content'
+
+
+def file_digest(file):
+    """Return sha256 hex digest of an uploaded file.
+
+    Uploads streamed by RecipeImageUploadHandler carry the digest already.
+    """
+    digest = getattr(file, 'sha256', None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        sha256.update(chunk)
+    file.seek(0)
+
+    return sha256.hexdigest()
+
+
+def acquire_blob(file):
+    """Store file once per content and return its blob with a new reference.
+    """
+    digest = file_digest(file)
+    path = image_blob_file_path(digest, file.name)
+    with transaction.atomic():
+        try:
+            with transaction.atomic():
+                blob, created = ImageBlob.objects.get_or_create(
+                    sha256=digest,
+                    defaults={'file': path, 'size': file.size},
+                )
+        except IntegrityError:
+            # A concurrent upload of the same content created it first.
+            blob = ImageBlob.objects.get(sha256=digest)
+        blob = ImageBlob.objects.select_for_update().get(pk=blob.pk)
+        if not default_storage.exists(blob.file.name):
+            default_storage.save(blob.file.name, file)
+        ImageBlob.objects.filter(pk=blob.pk).update(
+            ref_count=F('ref_count') + 1,
+        )
+
+    return blob
+
+
+def release_blob(name):
+    """Drop a reference to the blob stored at name.
+
+    The file and its variants are deleted after the commit once the last
+    reference is gone. Returns False when name is not a blob.
+    """
+    with transaction.atomic():
+        blob = ImageBlob.objects.select_for_update().filter(file=name).first()
+        if blob is None:
+            return False
+        if blob.ref_count > 1:
+            ImageBlob.objects.filter(pk=blob.pk).update(
+                ref_count=F('ref_count') - 1,
+            )
+            return True
+        blob.delete()
+
+    variants = {
+        str(size): variant_path(name, size)
+        for size in settings.RECIPE_IMAGE_VARIANT_SIZES
+    }
+
+    def delete_files():
+        default_storage.delete(name)
+        delete_variants(variants)
+
+    transaction.on_commit(delete_files)
+
+    return True
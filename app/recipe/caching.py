@@ -0,0 +1,165 @@
+"""
+Response cache for recipe API reads.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.versions import get_user_version
+
+ID_LIST_PARAMS = ('tags', 'ingredients')
+INT_PARAMS = ('assigned_only', 'with_counts')
+
+
+def _get_setting(name):
+    """Return response cache setting."""
+    return settings.RESPONSE_CACHE[name]
+
+
+def normalize_params(query_params):
+    """Return query parameters in a canonical order and form."""
+    normalized = []
+    for name in sorted(query_params):
+        value = query_params.get(name)
+        try:
+            if name in ID_LIST_PARAMS:
+                ids = sorted({int(i) for i in value.split(',') if i.strip()})
+                value = ','.join(str(i) for i in ids)
+            elif name in INT_PARAMS:
+                value = str(int(value))
+        except ValueError:
+            pass
+        normalized.append(f'{name}={value}')
+
+    return '&'.join(normalized)
+
+
+def build_cache_key(request, view_name, action, lookup=None):
+    """Return cache key for a read of the request user."""
+    parts = [
+        view_name,
+        action,
+        str(lookup or ''),
+        normalize_params(request.query_params),
+        str(request.version or ''),
+        request.accepted_media_type or '',
+    ]
+    digest = hashlib.sha256('|'.join(parts).encode()).hexdigest()
+    user_id = request.user.id
+    version = get_user_version(user_id)
+
+    return f'response:{user_id}:{version}:{digest}'
+
+
+def _lock_key(key):
+    """Return key of the lock held while a cached value is computed."""
+    return f'{key}:lock'
+
+
+def _registry_key(user_id):
+    """Return key of the set of cached response keys for a user."""
+    return f'response-keys:{user_id}'
+
+
+class ResponseCache:
+    """Cache of response data with per-user eviction and single flight.
+
+    Single flight takes a lock with cache.add, so it holds across worker
+    processes sharing the cache.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[_get_setting('CACHE')]
+
+    def stats(self):
+        """Return hit and miss counters of this process."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def reset_stats(self):
+        """Reset hit and miss counters."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_or_set(self, user_id, key, compute):
+        """Return cached value or compute it once for concurrent misses.
+
+        compute returns the value to cache, or None when the result
+        should not be cached.
+        """
+        value = self.cache.get(key)
+        if value is not None:
+            self._count(hit=True)
+            return value
+
+        timeout = _get_setting('SINGLE_FLIGHT_TIMEOUT')
+        lock_key = _lock_key(key)
+        leader = self.cache.add(lock_key, 1, timeout)
+        if not leader:
+            value = self._wait(key, lock_key, timeout)
+            if value is not None:
+                self._count(hit=True)
+                return value
+
+        try:
+            self._count(hit=False)
+            value = compute()
+            if value is not None:
+                self._store(user_id, key, value)
+        finally:
+            if leader:
+                self.cache.delete(lock_key)
+
+        return value
+
+    def _wait(self, key, lock_key, timeout):
+        """Poll for the value computed under lock_key, None if not cached.
+
+        Waiting ends when the value appears, when the lock is released
+        without a value, or after timeout seconds.
+        """
+        interval = _get_setting('SINGLE_FLIGHT_POLL_INTERVAL')
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            value = self.cache.get(key)
+            if value is not None:
+                return value
+            if self.cache.get(lock_key) is None:
+                return None
+
+        return None
+
+    def _store(self, user_id, key, value):
+        """Store value and remember its key for eviction."""
+        self.cache.set(key, value, _get_setting('TIMEOUT'))
+        registry_key = _registry_key(user_id)
+        keys = self.cache.get(registry_key) or set()
+        keys.add(key)
+        self.cache.set(registry_key, keys, None)
+
+    def evict_user(self, user_id):
+        """Delete every cached response of a user."""
+        registry_key = _registry_key(user_id)
+        keys = self.cache.get(registry_key) or set()
+        self.cache.delete_many(list(keys) + [registry_key])
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,154 @@
+"""
+Background generation of resized recipe image variants.
+"""
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import (
+    Image,
+    ImageOps,
+)
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import (
+    connections,
+    transaction,
+)
+
+from core.models import (
+    PENDING_IMAGE_VARIANTS,
+    ImageBlob,
+    Recipe,
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Return the shared worker pool, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-image',
+            )
+        return _executor
+
+
+def variant_path(image_name, size):
+    """Return storage path of a resized variant of an image."""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return os.path.join('uploads', 'recipe', 'variants', f'{stem}_{size}.jpg')
+
+
+def _resize(image_name):
+    """Create resized variants of an image and return their paths."""
+    with default_storage.open(image_name) as f:
+        original = ImageOps.exif_transpose(Image.open(f))
+        original = original.convert('RGB')
+
+    variants = {}
+    for size in settings.RECIPE_IMAGE_VARIANT_SIZES:
+        image = original.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=85, optimize=True)
+        path = variant_path(image_name, size)
+        default_storage.delete(path)
+        variants[str(size)] = default_storage.save(
+            path,
+            ContentFile(buffer.getvalue()),
+        )
+
+    return variants
+
+
+def generate_variants(recipe_id, image_name):
+    """Create resized variants and store them on the recipe."""
+    variants = {
+        str(size): variant_path(image_name, size)
+        for size in settings.RECIPE_IMAGE_VARIANT_SIZES
+    }
+    # Images stored by content share variants with other recipes.
+    if not all(default_storage.exists(path) for path in variants.values()):
+        variants = _resize(image_name)
+
+    recipe = Recipe.objects.filter(id=recipe_id, image=image_name).first()
+    if recipe is None:
+        # The image was replaced meanwhile; its own job makes new variants.
+        # Variants of a stored blob go away with its last reference.
+        if not ImageBlob.objects.filter(file=image_name).exists():
+            delete_variants(variants)
+        return
+    recipe.image_variants = variants
+    recipe.save(update_fields=['image_variants'])
+
+
+def _run_in_worker(recipe_id, image_name):
+    """Generate variants in a worker thread and release its connection."""
+    try:
+        generate_variants(recipe_id, image_name)
+    finally:
+        connections.close_all()
+
+
+def queue_variants(recipe):
+    """Generate variants of the recipe image after the commit.
+
+    With RECIPE_IMAGE_WORKER_PROCESS the generate_image_variants command
+    picks the recipe up instead, outside the web workers.
+    """
+    if settings.RECIPE_IMAGE_WORKER_PROCESS:
+        return
+    recipe_id, image_name = recipe.id, recipe.image.name
+
+    def submit():
+        if settings.RECIPE_IMAGE_WORKERS:
+            _get_executor().submit(_run_in_worker, recipe_id, image_name)
+        else:
+            generate_variants(recipe_id, image_name)
+
+    transaction.on_commit(submit)
+
+
+def pending_variants(limit):
+    """Return up to limit [(id, image name)] of recipes needing variants.
+
+    Jobs lost with a web worker leave their recipe here until the
+    generate_image_variants command makes the variants or marks them
+    failed. The filter matches a partial index of pending recipes.
+    """
+    return list(
+        Recipe.objects.filter(PENDING_IMAGE_VARIANTS)
+        .order_by('id')
+        .values_list('id', 'image')[:limit]
+    )
+
+
+def mark_variants_failed(recipe_id, image_name):
+    """Stop retrying variants of an image that cannot be resized."""
+    Recipe.objects.filter(id=recipe_id, image=image_name).update(
+        image_variants_failed=True,
+    )
+
+
+def delete_variants(variants):
+    """Delete variant files from storage."""
+    for path in variants.values():
+        default_storage.delete(path)
+
+
+def variant_urls(variants, request=None):
+    """Return {size: url} of generated variants of a recipe image."""
+    urls = {}
+    for size, path in (variants or {}).items():
+        url = default_storage.url(path)
+        urls[size] = request.build_absolute_uri(url) if request else url
+
+    return urls
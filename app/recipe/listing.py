@@ -0,0 +1,110 @@
+"""
+Read-optimized serialization of recipe lists.
+
+Builds the same representation as RecipeSerializer from values() rows,
+without the per-field serializer machinery.
+"""
+from django.db.models import (
+    F,
+    Value,
+)
+
+from core.models import Recipe
+from recipe.images import variant_urls
+
+RELATION_FIELDS = ('tags', 'ingredients')
+
+
+def recipe_values(queryset, fields, ordering):
+    """Return values() rows with the columns of fields and the ordering."""
+    columns = ['id']
+    for name in fields:
+        if name not in RELATION_FIELDS and name not in columns:
+            columns.append(name)
+    for name in ordering:
+        name = name.lstrip('-')
+        if name not in columns:
+            columns.append(name)
+
+    return queryset.prefetch_related(None).values(*columns)
+
+
+def attr_pairs(recipe_ids, fields):
+    """Return {field: {recipe_id: [item, ...]}} for relations in fields.
+
+    Pairs of every relation come from one query, ordered by item id like
+    the prefetches of the serializer path.
+    """
+    pairs = {field: {} for field in RELATION_FIELDS if field in fields}
+    queries = []
+    for field in pairs:
+        relation = getattr(Recipe, field)
+        target = relation.field.m2m_reverse_field_name()
+        queries.append(
+            relation.through.objects.filter(recipe_id__in=recipe_ids)
+            .values(
+                'recipe_id',
+                attr_id=F(f'{target}_id'),
+                name=F(f'{target}__name'),
+            )
+            .annotate(field=Value(field))
+        )
+    if not queries or not recipe_ids:
+        return pairs
+    rows = queries[0].union(*queries[1:], all=True).order_by(
+        'recipe_id',
+        'attr_id',
+    )
+    items = {}
+    for row in rows:
+        # Recipes of a page share items, so build each representation once.
+        key = (row['field'], row['attr_id'])
+        item = items.get(key)
+        if item is None:
+            item = items[key] = {'id': row['attr_id'], 'name': row['name']}
+        pairs[row['field']].setdefault(row['recipe_id'], []).append(item)
+
+    return pairs
+
+
+def serialize_recipe_rows(rows, serializer, request=None):
+    """Return representations of values() rows matching serializer."""
+    rows = list(rows)
+    fields = list(serializer.fields.items())
+    pairs = attr_pairs([row['id'] for row in rows], dict(fields))
+    data = []
+    for row in rows:
+        item = {}
+        for name, field in fields:
+            if name in pairs:
+                item[name] = pairs[name].get(row['id'], [])
+            elif name == 'image_variants':
+                item[name] = variant_urls(row[name], request)
+            elif row[name] is None:
+                item[name] = None
+            else:
+                item[name] = field.to_representation(row[name])
+        data.append(item)
+
+    return data
+
+
+def side_load_relations(data, fields):
+    """Replace nested tags and ingredients of recipes in data by id lists.
+
+    Returns {field: {id: item}} with the distinct items of relations in
+    fields, to be sent once next to the recipes.
+    """
+    included = {field: {} for field in RELATION_FIELDS if field in fields}
+    for index, recipe in enumerate(data):
+        normalized = {}
+        for name, value in recipe.items():
+            if name in included:
+                for item in value:
+                    included[name][item['id']] = item
+                normalized[f'{name[:-1]}_ids'] = [item['id'] for item in value]
+            else:
+                normalized[name] = value
+        data[index] = normalized
+
+    return included
@@ -0,0 +1,192 @@
+"""
+Django command to compare recipe list serialization paths.
+"""
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.renderers import (
+    FastJSONRenderer,
+    MessagePackRenderer,
+)
+from recipe.listing import (
+    RELATION_FIELDS,
+    recipe_values,
+    serialize_recipe_rows,
+    side_load_relations,
+)
+from recipe.serializers import RecipeSerializer
+from recipe.views import prefetch_recipe_attrs
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark data."""
+
+
+FORMATS = [
+    ('json', JSONRenderer, False),
+    ('fast json', FastJSONRenderer, False),
+    ('msgpack', MessagePackRenderer, False),
+    ('normalized', FastJSONRenderer, True),
+]
+
+
+class Command(BaseCommand):
+    """Django management command to benchmark recipe list rendering."""
+    help = (
+        'Time rendering recipe lists with RecipeSerializer and with the '
+        'values() path, and compare payload size and encode time of the '
+        'response formats, on generated data that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[100, 1000, 10000],
+        )
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--tags', type=int, default=3)
+        parser.add_argument('--ingredients', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _create_data(self, count, tags_per_recipe, ingredients_per_recipe):
+        """Create a user owning count recipes and return it."""
+        user = get_user_model().objects.create_user(
+            email='benchmark@example.com',
+            password=None,
+        )
+        Tag.objects.bulk_create(
+            [Tag(user=user, name=f'Tag {n}') for n in range(20)]
+        )
+        Ingredient.objects.bulk_create(
+            [Ingredient(user=user, name=f'Ingredient {n}') for n in range(50)]
+        )
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'Recipe {n}',
+                description='Description',
+                time_minutes=n % 120,
+                price=Decimal(n % 10000) / 100,
+                image_variants={'128': f'uploads/recipe/variants/{n}.jpg'},
+            )
+            for n in range(count)
+        ])
+        # Read the ids back, bulk_create sets them only on some databases.
+        tags = list(Tag.objects.filter(user=user).order_by('id'))
+        ingredients = list(Ingredient.objects.filter(user=user).order_by('id'))
+        recipes = list(Recipe.objects.filter(user=user).order_by('id'))
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(
+                recipe_id=recipe.id,
+                tag_id=tags[(i + n) % len(tags)].id,
+            )
+            for i, recipe in enumerate(recipes)
+            for n in range(tags_per_recipe)
+        ])
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(
+                recipe_id=recipe.id,
+                ingredient_id=ingredients[(i + n) % len(ingredients)].id,
+            )
+            for i, recipe in enumerate(recipes)
+            for n in range(ingredients_per_recipe)
+        ])
+
+        return user
+
+    def _best(self, repeat, render):
+        """Return output and best wall time in seconds of render."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = render()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        return content, best
+
+    def _run(self, options):
+        sizes = sorted(options['sizes'])
+        user = self._create_data(
+            sizes[-1],
+            options['tags'],
+            options['ingredients'],
+        )
+        renderer = JSONRenderer()
+        pages = {}
+
+        self.stdout.write(
+            f'{"recipes":>8} {"serializer ms":>14} {"values ms":>10} '
+            f'{"speedup":>8}'
+        )
+        for size in sizes:
+            queryset = Recipe.objects.filter(user=user).order_by('-id')
+
+            def serializer_path():
+                recipes = prefetch_recipe_attrs(queryset[:size])
+                data = RecipeSerializer(recipes, many=True).data
+                return renderer.render(data)
+
+            def values_path():
+                serializer = RecipeSerializer()
+                rows = recipe_values(
+                    queryset[:size],
+                    serializer.fields,
+                    ['-id'],
+                )
+                pages[size] = serialize_recipe_rows(rows, serializer)
+                return renderer.render(pages[size])
+
+            slow_content, slow = self._best(options['repeat'], serializer_path)
+            fast_content, fast = self._best(options['repeat'], values_path)
+            if slow_content != fast_content:
+                self.stderr.write(f'Output differs for {size} recipes.')
+            self.stdout.write(
+                f'{size:>8} {slow * 1000:>14.1f} {fast * 1000:>10.1f} '
+                f'{slow / fast:>7.1f}x'
+            )
+
+        self._compare_formats(pages, options['repeat'])
+
+    def _compare_formats(self, pages, repeat):
+        """Print payload size and encode time of each format per page."""
+        self.stdout.write(
+            f'{"recipes":>8} {"format":>10} {"bytes":>10} {"encode ms":>10}'
+        )
+        for size, data in pages.items():
+            for name, renderer_class, normalized in FORMATS:
+                renderer = renderer_class()
+
+                def encode():
+                    if not normalized:
+                        return renderer.render(data)
+                    results = list(data)
+                    included = side_load_relations(results, RELATION_FIELDS)
+                    return renderer.render({'results': results, **included})
+
+                content, elapsed = self._best(repeat, encode)
+                self.stdout.write(
+                    f'{size:>8} {name:>10} {len(content):>10} '
+                    f'{elapsed * 1000:>10.1f}'
+                )
@@ -0,0 +1,76 @@
+"""
+Django command to generate missing recipe image variants.
+"""
+import time
+
+from PIL import Image
+
+from django.core.management.base import BaseCommand
+
+from recipe.images import (
+    generate_variants,
+    mark_variants_failed,
+    pending_variants,
+)
+
+
+class Command(BaseCommand):
+    """Django management command to generate recipe image variants."""
+    help = (
+        'Generate variants of recipe images that have none, e.g. after a '
+        'web worker restart dropped queued jobs. With --loop keep polling, '
+        'as the worker process for RECIPE_IMAGE_WORKER_PROCESS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for recipes without variants.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds between polls with --loop.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Recipes read per query.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        while True:
+            generated, more = self._generate(options['batch_size'])
+            if generated:
+                self.stdout.write(f'Generated variants of {generated} images.')
+            if more:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def _generate(self, batch_size):
+        """Generate variants of a batch of pending recipes.
+
+        Returns how many succeeded and whether the batch was full. Images
+        that fail are marked in the database and not read again.
+        """
+        generated = 0
+        pending = pending_variants(batch_size)
+        for recipe_id, image_name in pending:
+            try:
+                generate_variants(recipe_id, image_name)
+            except (OSError, ValueError, Image.DecompressionBombError) as exc:
+                mark_variants_failed(recipe_id, image_name)
+                self.stderr.write(
+                    f'Cannot resize {image_name} of recipe {recipe_id}: '
+                    f'{exc!r}'
+                )
+                continue
+            generated += 1
+
+        return generated, len(pending) == batch_size
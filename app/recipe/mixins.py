@@ -0,0 +1,115 @@
+"""
+View mixins for recipe API.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.http import parse_etags
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.versions import get_user_version
+from recipe.caching import (
+    build_cache_key,
+    response_cache,
+)
+
+
+class NotModified(Exception):
+    """Client already has the current representation."""
+
+
+def _strip_weak(etag):
+    """Return etag without the weak indicator."""
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(etag, if_none_match):
+    """Return True if etag weakly matches an If-None-Match header."""
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    if '*' in etags:
+        return True
+
+    return _strip_weak(etag) in [_strip_weak(tag) for tag in etags]
+
+
+class ConditionalGetMixin:
+    """Answer reads with weak ETags built from the user data version."""
+    conditional_actions = ('list', 'retrieve')
+
+    def get_etag(self, request):
+        """Return weak ETag for the current request."""
+        version = get_user_version(request.user.id)
+        representation = ':'.join([
+            str(request.user.id),
+            request.get_full_path(),
+            request.accepted_media_type or '',
+        ])
+        digest = hashlib.sha256(representation.encode()).hexdigest()[:16]
+
+        return f'W/"{version}-{digest}"'
+
+    def initial(self, request, *args, **kwargs):
+        """Stop with 304 before any query if the client is up to date."""
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if request.method in ('GET', 'HEAD') and \
+                self.action in self.conditional_actions:
+            self.etag = self.get_etag(request)
+            if etag_matches(self.etag, request.META.get('HTTP_IF_NONE_MATCH')):
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        """Return empty 304 response for NotModified."""
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Add ETag header to successful reads."""
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        etag = getattr(self, 'etag', None)
+        if etag and response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            response['ETag'] = etag
+
+        return response
+
+
+class CachedResponseMixin:
+    """Serve reads from the response cache when it is enabled."""
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Return cached response data or call handler to build it."""
+        if not settings.RESPONSE_CACHE['ENABLED']:
+            return handler(request, *args, **kwargs)
+
+        lookup = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        key = build_cache_key(
+            request,
+            type(self).__name__,
+            self.action,
+            lookup,
+        )
+        computed = {}
+
+        def compute():
+            response = handler(request, *args, **kwargs)
+            computed['response'] = response
+            if response.status_code != status.HTTP_200_OK:
+                return None
+            return response.data
+
+        data = response_cache.get_or_set(request.user.id, key, compute)
+        if 'response' in computed:
+            return computed['response']
+
+        return Response(data)
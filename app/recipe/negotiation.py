@@ -0,0 +1,38 @@
+"""
+Content negotiation for recipe API.
+"""
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.settings import APISettings
+
+NORMALIZED_FORMAT = 'normalized'
+
+
+def is_normalized(request):
+    """Return whether the request asks for the normalized representation."""
+    return request.query_params.get('format') == NORMALIZED_FORMAT
+
+
+class AcceptContentNegotiation(DefaultContentNegotiation):
+    """Select renderers by the Accept header only."""
+    settings = APISettings({'URL_FORMAT_OVERRIDE': None})
+
+
+class NormalizedContentNegotiation(DefaultContentNegotiation):
+    """Negotiate ?format=normalized reads by the Accept header.
+
+    The format query parameter also picks renderers (URL_FORMAT_OVERRIDE),
+    so for actions in the view's normalized_actions the value normalized
+    is not taken as a renderer format.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        view = request.parser_context.get('view')
+        if not format_suffix and is_normalized(request) and getattr(
+            view, 'action', None,
+        ) in getattr(view, 'normalized_actions', ()):
+            return AcceptContentNegotiation().select_renderer(
+                request,
+                renderers,
+            )
+
+        return super().select_renderer(request, renderers, format_suffix)
@@ -0,0 +1,198 @@
+"""
+Pagination for recipe API.
+"""
+import binascii
+import json
+from base64 import (
+    urlsafe_b64decode,
+    urlsafe_b64encode,
+)
+from collections import namedtuple
+
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ValidationError,
+)
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+Cursor = namedtuple('Cursor', ['position', 'reverse'])
+
+
+def reverse_ordering(ordering):
+    """Return ordering with every field in the opposite direction."""
+    return [
+        name[1:] if name.startswith('-') else f'-{name}'
+        for name in ordering
+    ]
+
+
+def item_position(item, ordering):
+    """Return values of the ordering fields of a model instance or row."""
+    names = [name.lstrip('-') for name in ordering]
+    if isinstance(item, dict):
+        return [item[name] for name in names]
+
+    return [getattr(item, name) for name in names]
+
+
+def keyset_filter(ordering, position):
+    """Return Q matching rows after position in ordering.
+
+    For ['price', 'id'] this is price > v OR (price = v AND id > pk),
+    with lt for fields ordered descending.
+    """
+    condition = Q()
+    equal = {}
+    for name, value in zip(ordering, position):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{field}__{lookup}': value})
+        equal[field] = value
+
+    return condition
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination for recipes, newest first.
+
+    The cursor holds the values of every ordering field of the last row,
+    so ties on a field are resolved by the id tiebreaker instead of an
+    offset. Views may order by something else by defining
+    get_pagination_ordering.
+    """
+    ordering = '-id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        get_ordering = getattr(view, 'get_pagination_ordering', None)
+        if get_ordering is not None:
+            ordering = list(get_ordering())
+        else:
+            ordering = list(super().get_ordering(request, queryset, view))
+        if not any(name.lstrip('-') == 'id' for name in ordering):
+            direction = '-' if ordering[-1].startswith('-') else ''
+            ordering.append(f'{direction}id')
+
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        ordering = self.ordering
+        if reverse:
+            ordering = reverse_ordering(ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            position = self._clean_position(queryset, self.cursor.position)
+            queryset = queryset.filter(keyset_filter(ordering, position))
+
+        # One extra row tells whether another page follows.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > len(self.page)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        if self.page:
+            self.previous_position = item_position(self.page[0], self.ordering)
+            self.next_position = item_position(self.page[-1], self.ordering)
+        elif self.cursor is not None:
+            self.previous_position = self.cursor.position
+            self.next_position = self.cursor.position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _clean_position(self, queryset, position):
+        """Return cursor position converted to the ordering field types."""
+        if not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        cleaned = []
+        for name, value in zip(self.ordering, position):
+            name = name.lstrip('-')
+            annotation = queryset.query.annotations.get(name)
+            try:
+                if annotation is not None:
+                    field = annotation.output_field
+                else:
+                    field = queryset.model._meta.get_field(name)
+                value = field.to_python(value)
+            except (FieldDoesNotExist, ValidationError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            cleaned.append(value)
+
+        return cleaned
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor(Cursor(self.next_position, False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        return self.encode_cursor(Cursor(self.previous_position, True))
+
+    def decode_cursor(self, request):
+        """Return Cursor of the request, None on the first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            data = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            cursor = Cursor(data['p'], data['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(cursor.reverse, bool):
+            raise NotFound(self.invalid_cursor_message)
+
+        return cursor
+
+    def encode_cursor(self, cursor):
+        """Return URL of the page at cursor."""
+        data = json.dumps(
+            {'p': cursor.position, 'r': cursor.reverse},
+            cls=DjangoJSONEncoder,
+            separators=(',', ':'),
+        )
+        encoded = urlsafe_b64encode(data.encode()).decode('ascii')
+
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            encoded,
+        )
+
+
+class RecipeAttrCursorPagination(RecipeCursorPagination):
+    """Keyset pagination for tags and ingredients by name."""
+    ordering = '-name'
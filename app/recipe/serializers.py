@@ -1,6 +1,17 @@
 """
 Serializer for recipe API.
 """
+from django.db import (
+    connection,
+    transaction,
+)
+from django.db.models.signals import (
+    m2m_changed,
+    post_save,
+)
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from core.models import (
@@ -8,9 +19,37 @@ from core.models import (
     Tag,
     Ingredient,
 )
+from recipe.blobs import (
+    acquire_blob,
+    content_addressed,
+    release_blob,
+)
+from recipe.images import (
+    delete_variants,
+    queue_variants,
+    variant_urls,
+)
+
 
+class BaseRecipeAttrSerializer(serializers.ModelSerializer):
+    """Base serializer for recipe attributes."""
 
-class TagSerializer(serializers.ModelSerializer):
+    def validate_name(self, value):
+        """Reject renaming to a name the user already has."""
+        if self.instance is not None:
+            duplicate = type(self.instance).objects.filter(
+                user=self.instance.user,
+                name=value,
+            ).exclude(id=self.instance.id)
+            if duplicate.exists():
+                raise serializers.ValidationError(
+                    'An item with this name already exists.'
+                )
+
+        return value
+
+
+class TagSerializer(BaseRecipeAttrSerializer):
     """Serializer for tags."""
     class Meta:
         model = Tag
@@ -18,7 +57,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_filelds = ['id']
         
         
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(BaseRecipeAttrSerializer):
     """Serializer for ingredient."""
     class Meta:
         model = Ingredient
@@ -26,58 +65,157 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class TagCountSerializer(TagSerializer):
+    """Serializer for tags with their number of recipes."""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['recipe_count']
+
+
+class IngredientCountSerializer(IngredientSerializer):
+    """Serializer for ingredients with their number of recipes."""
+    recipe_count = serializers.IntegerField(read_only=True)
+
+    class Meta(IngredientSerializer.Meta):
+        fields = IngredientSerializer.Meta.fields + ['recipe_count']
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Field with URLs of generated image variants by size."""
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return variant_urls(
+            recipe.image_variants,
+            self.context.get('request'),
+        )
+
+
+class SparseFieldsetMixin:
+    """Serialize only the field names in the 'fields' context entry."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for recipes."""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
         fields = [
-            'id', 'title', 'time_minutes', 'price', 'tags', 'ingredients'
+            'id', 'title', 'time_minutes', 'price', 'tags', 'ingredients',
+            'image_variants',
             ]
         read_only_fields = ['id']
 
-    def _get_or_create_tag(self, recipe, tags):
-        """Handling getting or creating tag as needed."""
+    def _get_or_create_attrs(self, model, names):
+        """Return ids by name, creating missing attributes in bulk."""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                name=tag['name']
+        ids = dict(model.objects.filter(
+            user=auth_user,
+            name__in=names,
+        ).values_list('name', 'id'))
+        missing = [name for name in names if name not in ids]
+        if missing:
+            model.objects.bulk_create(
+                [model(user=auth_user, name=name) for name in missing],
+                ignore_conflicts=True,
             )
-            recipe.tags.add(tag_obj)
-
-    def _get_or_create_ingredient(self, recipe, ingredients):
-        """Handling getting or creatinh ingredient as needed."""
-        auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ing_obj, created = Ingredient.objects.get_or_create(
+            ids.update(model.objects.filter(
                 user=auth_user,
-                name=ingredient['name']
+                name__in=missing,
+            ).values_list('name', 'id'))
+
+        return ids
+
+    def _set_attrs(self, field, assignments):
+        """Assign tags or ingredients by name to (recipe, items) pairs."""
+        descriptor = getattr(Recipe, field)
+        model = descriptor.field.related_model
+        through = descriptor.through
+        source = f'{descriptor.field.m2m_field_name()}_id'
+        target = f'{descriptor.field.m2m_reverse_field_name()}_id'
+        names = list(dict.fromkeys(
+            item['name'] for recipe, items in assignments for item in items
+        ))
+        if not names:
+            return
+        ids = self._get_or_create_attrs(model, names)
+        pk_sets = [
+            (recipe, {ids[item['name']] for item in items})
+            for recipe, items in assignments if items
+        ]
+
+        # Bulk insert bypasses the related manager, so mirror its signals.
+        self._send_m2m_changed('pre_add', through, model, pk_sets)
+        through.objects.bulk_create([
+            through(**{source: recipe.id, target: pk})
+            for recipe, pk_set in pk_sets for pk in pk_set
+        ], ignore_conflicts=True)
+        self._send_m2m_changed('post_add', through, model, pk_sets)
+
+    def _clear_attrs(self, field, recipes):
+        """Remove all tags or ingredients of recipes with one delete."""
+        if not recipes:
+            return
+        descriptor = getattr(Recipe, field)
+        model = descriptor.field.related_model
+        through = descriptor.through
+        pk_sets = [(recipe, None) for recipe in recipes]
+        self._send_m2m_changed('pre_clear', through, model, pk_sets)
+        through.objects.filter(
+            recipe_id__in=[recipe.id for recipe in recipes]
+        ).delete()
+        self._send_m2m_changed('post_clear', through, model, pk_sets)
+
+    def _send_m2m_changed(self, action, through, model, pk_sets):
+        """Send m2m_changed for each recipe as RelatedManager.add does."""
+        for recipe, pk_set in pk_sets:
+            m2m_changed.send(
+                sender=through,
+                action=action,
+                instance=recipe,
+                reverse=False,
+                model=model,
+                pk_set=pk_set,
+                using=recipe._state.db,
             )
-            recipe.ingredients.add(ing_obj)
 
+    @transaction.atomic
     def create(self, validated_data):
         """Create and return recipe with tags."""
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
         recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tag(recipe, tags)
-        self._get_or_create_ingredient(recipe, ingredients)
+        self._set_attrs('tags', [(recipe, tags)])
+        self._set_attrs('ingredients', [(recipe, ingredients)])
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update recipe."""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
         if tags is not None:
             instance.tags.clear()
-            self._get_or_create_tag(instance, tags)
+            self._set_attrs('tags', [(instance, tags)])
         if ingredients is not None:
             instance.ingredients.clear()
-            self._get_or_create_ingredient(instance, ingredients)
+            self._set_attrs('ingredients', [(instance, ingredients)])
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -85,6 +223,68 @@ class RecipeSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+    @transaction.atomic
+    def bulk_save(self, entries, **kwargs):
+        """Create or update (instance, validated_data) pairs in bulk.
+
+        Instances of None are created with kwargs as extra fields. Returns
+        the saved recipes in the order of entries.
+        """
+        saved = []
+        created, updated, update_fields = [], [], set()
+        for instance, validated_data in entries:
+            validated_data = dict(validated_data)
+            related = {
+                field: validated_data.pop(field, None)
+                for field in ('tags', 'ingredients')
+            }
+            if instance is None:
+                instance = Recipe(**validated_data, **kwargs)
+                created.append(instance)
+            else:
+                for attr, value in validated_data.items():
+                    setattr(instance, attr, value)
+                update_fields.update(validated_data)
+                updated.append(instance)
+            saved.append((instance, related))
+
+        inserted = []
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(created)
+            inserted = created
+        else:
+            # Without RETURNING bulk_create leaves ids unset, which the
+            # relations and the response need.
+            for instance in created:
+                instance.save(force_insert=True)
+        if update_fields:
+            Recipe.objects.bulk_update(updated, update_fields)
+        # Bulk queries skip Model.save(), so mirror its signals.
+        for is_new, instances in [(True, inserted), (False, updated)]:
+            for instance in instances:
+                post_save.send(
+                    sender=Recipe,
+                    instance=instance,
+                    created=is_new,
+                    update_fields=None,
+                    raw=False,
+                    using=instance._state.db,
+                )
+
+        updated_ids = {instance.id for instance in updated}
+        for field in ('tags', 'ingredients'):
+            assignments = [
+                (recipe, related[field]) for recipe, related in saved
+                if related[field] is not None
+            ]
+            self._clear_attrs(field, [
+                recipe for recipe, items in assignments
+                if recipe.id in updated_ids
+            ])
+            self._set_attrs(field, assignments)
+
+        return [recipe for recipe, related in saved]
+
 
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail view."""
@@ -92,10 +292,42 @@ class RecipeDetailSerializer(RecipeSerializer):
         fields = RecipeSerializer.Meta.fields + ['description']
 
 
+class FacetSerializer(serializers.Serializer):
+    """Serializer for the recipe count of a tag or ingredient."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    count = serializers.IntegerField()
+
+
+class FacetsSerializer(serializers.Serializer):
+    """Serializer for recipe counts per tag and ingredient."""
+    tags = FacetSerializer(many=True)
+    ingredients = FacetSerializer(many=True)
+
+
 class ImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading image to the recipe."""
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'image_variants']
         read_only_fields = ['id']
         extra_kwargs = {'image': {'required': True}}
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """Save image and queue generation of its variants."""
+        old_image = instance.image.name
+        old_variants = instance.image_variants
+        instance.image_variants = {}
+        instance.image_variants_failed = False
+        if content_addressed():
+            blob = acquire_blob(validated_data.pop('image'))
+            instance.image = blob.file.name
+        instance = super().update(instance, validated_data)
+        if not (old_image and release_blob(old_image)):
+            transaction.on_commit(lambda: delete_variants(old_variants))
+        queue_variants(instance)
+
+        return instance
@@ -0,0 +1,50 @@
+"""
+Signal handlers for recipe API.
+"""
+from django.conf import settings
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.blobs import release_blob
+from recipe.caching import response_cache
+
+
+def _evict(user_id):
+    """Evict cached responses of a user if the cache is enabled."""
+    if settings.RESPONSE_CACHE['ENABLED']:
+        response_cache.evict_user(user_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def evict_responses_on_change(sender, instance, **kwargs):
+    """Evict cached responses of the owner of a changed object."""
+    _evict(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def evict_responses_on_m2m_change(sender, instance, action, **kwargs):
+    """Evict cached responses when recipe tags or ingredients change."""
+    if action.startswith('post_'):
+        _evict(instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_image_on_delete(sender, instance, **kwargs):
+    """Drop the reference of a deleted recipe to its stored image."""
+    if instance.image:
+        release_blob(instance.image.name)
@@ -0,0 +1,145 @@
+"""Tests recipe django commands."""
+from decimal import Decimal
+from io import (
+    BytesIO,
+    StringIO,
+)
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import (
+    TestCase,
+    override_settings,
+)
+
+from core.models import Recipe
+from recipe.images import (
+    delete_variants,
+    pending_variants,
+    queue_variants,
+)
+
+
+class BenchmarkRecipeListTests(TestCase):
+    """Tests the recipe list benchmark command."""
+
+    def test_benchmark_reports_sizes(self):
+        """Test benchmark prints a row per size and rolls back its data."""
+        out = StringIO()
+        err = StringIO()
+
+        call_command(
+            'benchmark_recipe_list', '--sizes', '3', '5', '--repeat', '1',
+            stdout=out, stderr=err,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 12)
+        self.assertEqual(lines[1].split()[0], '3')
+        self.assertEqual(lines[2].split()[0], '5')
+        self.assertEqual(
+            [line.split()[-3] for line in lines[4:8]],
+            ['json', 'json', 'msgpack', 'normalized'],
+        )
+        self.assertEqual(err.getvalue(), '')
+        self.assertFalse(Recipe.objects.exists())
+
+
+class GenerateImageVariantsTests(TestCase):
+    """Tests generating missing recipe image variants."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        buffer = BytesIO()
+        Image.new('RGB', (600, 300)).save(buffer, format='JPEG')
+        self.image = default_storage.save(
+            'uploads/recipe/test.jpg',
+            ContentFile(buffer.getvalue()),
+        )
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=10,
+            price=Decimal('2.50'),
+            image=self.image,
+        )
+
+    def tearDown(self):
+        self.recipe.refresh_from_db()
+        delete_variants(self.recipe.image_variants)
+        default_storage.delete(self.image)
+
+    def test_generates_missing_variants(self):
+        """Test recipes with an image but no variants get them."""
+        out = StringIO()
+
+        call_command('generate_image_variants', stdout=out)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            set(self.recipe.image_variants),
+            {'128', '512', '1024'},
+        )
+        self.assertIn('Generated variants of 1 images.', out.getvalue())
+        out = StringIO()
+        call_command('generate_image_variants', stdout=out)
+        self.assertEqual(out.getvalue(), '')
+
+    def test_broken_image_reported(self):
+        """Test images that cannot be resized are reported and skipped."""
+        default_storage.delete(self.image)
+        default_storage.save(self.image, ContentFile(b'not an image'))
+        err = StringIO()
+
+        call_command('generate_image_variants', stdout=StringIO(), stderr=err)
+
+        self.assertIn(f'recipe {self.recipe.id}', err.getvalue())
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, {})
+        self.assertTrue(self.recipe.image_variants_failed)
+        self.assertEqual(pending_variants(10), [])
+
+    def test_pending_read_in_batches(self):
+        """Test every pending recipe is generated in limited batches."""
+        recipes = [self.recipe] + [
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Soup {i}',
+                time_minutes=10,
+                price=Decimal('2.50'),
+                image=self.image,
+            )
+            for i in range(2)
+        ]
+        self.assertEqual(len(pending_variants(2)), 2)
+
+        call_command(
+            'generate_image_variants', '--batch-size', '2',
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(pending_variants(10), [])
+        for recipe in recipes:
+            recipe.refresh_from_db()
+            self.assertEqual(len(recipe.image_variants), 3)
+
+    @override_settings(RECIPE_IMAGE_WORKER_PROCESS=True)
+    def test_worker_process_mode_leaves_job_to_command(self):
+        """Test web workers do not resize with a worker process."""
+        with patch('recipe.images._get_executor') as patched_executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                queue_variants(self.recipe)
+
+        patched_executor.assert_not_called()
+        self.assertEqual(
+            pending_variants(10),
+            [(self.recipe.id, self.image)],
+        )
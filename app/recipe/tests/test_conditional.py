@@ -0,0 +1,187 @@
+"""
+Tests for ETag conditional requests on recipe API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from core.versions import (
+    bump_user_version,
+    get_user_version,
+)
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+def detail_url(recipe_id):
+    """Create and return recipe detail url."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_user(email='test@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipe(user, **params):
+    """Create and return a recipe."""
+    defaults = {
+        'title': 'Sample Title',
+        'time_minutes': 22,
+        'price': Decimal('3.45'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class UserVersionTests(TestCase):
+    """Tests per-user data versions."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+
+    def test_version_stable_without_changes(self):
+        """Test version does not change when nothing changes."""
+        self.assertEqual(
+            get_user_version(self.user.id),
+            get_user_version(self.user.id),
+        )
+
+    def test_bump_changes_version(self):
+        """Test bumping returns a new version."""
+        version = get_user_version(self.user.id)
+        bump_user_version(self.user.id)
+
+        self.assertNotEqual(get_user_version(self.user.id), version)
+
+    def test_model_changes_bump_version(self):
+        """Test saving, deleting and m2m changes bump version."""
+        versions = [get_user_version(self.user.id)]
+        recipe = create_recipe(self.user)
+        versions.append(get_user_version(self.user.id))
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        versions.append(get_user_version(self.user.id))
+        recipe.tags.add(tag)
+        versions.append(get_user_version(self.user.id))
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        versions.append(get_user_version(self.user.id))
+        recipe.ingredients.add(ingredient)
+        versions.append(get_user_version(self.user.id))
+        recipe.tags.clear()
+        versions.append(get_user_version(self.user.id))
+        recipe.delete()
+        versions.append(get_user_version(self.user.id))
+
+        self.assertEqual(len(set(versions)), len(versions))
+
+    def test_other_user_changes_keep_version(self):
+        """Test changes of another user do not bump version."""
+        version = get_user_version(self.user.id)
+        other = create_user(email='other@example.com')
+        create_recipe(other)
+
+        self.assertEqual(get_user_version(self.user.id), version)
+
+
+class ConditionalGetTests(TestCase):
+    """Tests ETag and If-None-Match handling."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def test_list_returns_etag(self):
+        """Test list responses include a weak ETag."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('W/"'))
+
+    def test_not_modified_without_queries(self):
+        """Test matching If-None-Match returns 304 without queries."""
+        create_recipe(self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_change_invalidates_etag(self):
+        """Test changing data makes the old ETag stale."""
+        recipe = create_recipe(self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_etag_depends_on_query(self):
+        """Test different query parameters produce different ETags."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        res = self.client.get(
+            RECIPES_URL,
+            {'tags': '1'},
+            HTTP_IF_NONE_MATCH=etag,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        """Test recipe detail supports conditional requests."""
+        recipe = create_recipe(self.user)
+        url = detail_url(recipe.id)
+        etag = self.client.get(url)['ETag']
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(url, {'title': 'New title'})
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_tags_and_ingredients_not_modified(self):
+        """Test tag and ingredient lists support conditional requests."""
+        Tag.objects.create(user=self.user, name='Vegan')
+        Ingredient.objects.create(user=self.user, name='Salt')
+        for url in [TAGS_URL, INGREDIENTS_URL]:
+            etag = self.client.get(url)['ETag']
+
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_writes_have_no_etag(self):
+        """Test unsafe methods are not conditional."""
+        payload = {
+            'title': 'Soup',
+            'time_minutes': 10,
+            'price': Decimal('2.00'),
+        }
+        res = self.client.post(RECIPES_URL, payload, HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('ETag', res)
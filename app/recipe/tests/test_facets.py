@@ -0,0 +1,118 @@
+"""
+Tests for recipe facet counts.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+FACETS_URL = reverse('recipe:recipe-facets')
+
+
+def create_recipe(user, **params):
+    """Create and return a recipe."""
+    defaults = {
+        'title': 'Sample Title',
+        'time_minutes': 22,
+        'price': Decimal('3.45'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class FacetsApiTests(TestCase):
+    """Tests recipe counts per tag and ingredient."""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['responses'].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.dinner = Tag.objects.create(user=self.user, name='Dinner')
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        soup = create_recipe(self.user, title='Soup')
+        soup.tags.add(self.dinner, self.vegan)
+        soup.ingredients.add(self.salt)
+        stew = create_recipe(self.user, title='Stew')
+        stew.tags.add(self.dinner)
+        stew.ingredients.add(self.salt)
+        create_recipe(self.user, title='Toast')
+
+    def test_counts(self):
+        """Test counts of all recipes come from one query."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        create_recipe(other).tags.add(
+            Tag.objects.create(user=other, name='Dinner'),
+        )
+
+        with self.assertNumQueries(1):
+            res = self.client.get(FACETS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {
+            'tags': [
+                {'id': self.dinner.id, 'name': 'Dinner', 'count': 2},
+                {'id': self.vegan.id, 'name': 'Vegan', 'count': 1},
+            ],
+            'ingredients': [
+                {'id': self.salt.id, 'name': 'Salt', 'count': 2},
+            ],
+        })
+
+    def test_counts_scoped_by_filters(self):
+        """Test recipe list filters narrow the counted recipes."""
+        res = self.client.get(FACETS_URL, {'tags': str(self.vegan.id)})
+
+        self.assertEqual(
+            [(item['name'], item['count']) for item in res.data['tags']],
+            [('Dinner', 1), ('Vegan', 1)],
+        )
+
+        res = self.client.get(FACETS_URL, {'search': 'stew'})
+
+        self.assertEqual(
+            [(item['name'], item['count']) for item in res.data['tags']],
+            [('Dinner', 1)],
+        )
+
+    def test_cached_until_data_changes(self):
+        """Test counts are served from cache until recipes change."""
+        self.client.get(FACETS_URL)
+        with self.assertNumQueries(0):
+            self.client.get(FACETS_URL)
+
+        Recipe.objects.get(title='Toast').tags.add(self.vegan)
+        res = self.client.get(FACETS_URL)
+
+        self.assertEqual(
+            [(item['name'], item['count']) for item in res.data['tags']],
+            [('Dinner', 2), ('Vegan', 2)],
+        )
+
+    def test_not_modified(self):
+        """Test facets answer conditional requests."""
+        res = self.client.get(FACETS_URL)
+
+        res = self.client.get(FACETS_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
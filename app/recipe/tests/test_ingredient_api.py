@@ -16,6 +16,7 @@ from recipe.serializers import IngredientSerializer
 
 
 INGREDIENTS_URL = reverse('recipe:ingredient-list')
+AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
 
 
 def detail_url(ingredient_id):
@@ -57,7 +58,7 @@ class PrivateIngredientApiTest(TestCase):
         ingredients = Ingredient.objects.all().order_by('-name')
         serializer = IngredientSerializer(ingredients, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredient_limited_to_user(self):
         """Test ingredient limited to authenticated user"""
@@ -68,8 +69,8 @@ class PrivateIngredientApiTest(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
 
     def test_upgrade_ingredient(self):
         """Test updating ingredient."""
@@ -110,8 +111,8 @@ class PrivateIngredientApiTest(TestCase):
         s2 = IngredientSerializer(ing2)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filter_ingredient_unique(self):
         """Test filtering return unique ingredient assign to a few recipes."""
@@ -133,4 +134,37 @@ class PrivateIngredientApiTest(TestCase):
         r2.ingredients.add(ing)
 
         res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_ingredients_with_counts(self):
+        """Test ingredients are listed with their number of recipes."""
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=10,
+            price=Decimal('2.50'),
+        )
+        recipe.ingredients.add(salt)
+
+        res = self.client.get(INGREDIENTS_URL, {'with_counts': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'],
+            [{'id': salt.id, 'name': 'Salt', 'recipe_count': 1}],
+        )
+
+    def test_autocomplete(self):
+        """Test ingredient names of the user are suggested by prefix."""
+        Ingredient.objects.create(user=self.user, name='Garlic')
+        Ingredient.objects.create(user=self.user, name='Ginger')
+        Ingredient.objects.create(
+            user=create_user(email='o@example.com'),
+            name='Garam masala',
+        )
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'ga'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in res.data], ['Garlic'])
@@ -0,0 +1,158 @@
+"""
+Tests for cursor pagination of recipe API lists.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+)
+from recipe.pagination import RecipeCursorPagination
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def create_user(email='test@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email=email, password=password)
+
+
+def create_recipes(user, count):
+    """Create and return a list of recipes."""
+    return [
+        Recipe.objects.create(
+            user=user,
+            title=f'Recipe {i}',
+            time_minutes=10,
+            price=Decimal('1.50'),
+        )
+        for i in range(count)
+    ]
+
+
+class CursorPaginationTests(TestCase):
+    """Tests paginating recipe API lists."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def _walk(self, url, params):
+        """Follow next links and return all pages."""
+        pages = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+            if not res.data['next']:
+                return pages
+            res = self.client.get(res.data['next'])
+
+    def test_recipes_page_size(self):
+        """Test client can set recipes page size."""
+        create_recipes(self.user, 5)
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+        self.assertNotIn('count', res.data)
+
+    def test_recipes_walk_all_pages(self):
+        """Test following cursors returns every recipe once in order."""
+        recipes = create_recipes(self.user, 7)
+
+        pages = self._walk(RECIPES_URL, {'page_size': 3})
+        ids = [r['id'] for page in pages for r in page['results']]
+
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(ids, sorted((r.id for r in recipes), reverse=True))
+
+    def test_max_page_size(self):
+        """Test page size is capped by server maximum."""
+        create_recipes(self.user, 3)
+        with patch.object(RecipeCursorPagination, 'max_page_size', 2):
+            res = self.client.get(RECIPES_URL, {'page_size': 100})
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_deep_page_uses_keyset(self):
+        """Test deep pages filter by position without OFFSET or COUNT."""
+        create_recipes(self.user, 6)
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+        res = self.client.get(res.data['next'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries).upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    def test_ties_beyond_offset_cutoff(self):
+        """Test paging through more equal values than an offset allows."""
+        count = RecipeCursorPagination.offset_cutoff + 101
+        Recipe.objects.bulk_create(
+            Recipe(
+                user=self.user,
+                title='Same',
+                time_minutes=10,
+                price=Decimal('1.50'),
+            )
+            for _ in range(count)
+        )
+
+        for ordering in ['price', '-price', 'title', '-time_minutes']:
+            pages = self._walk(
+                RECIPES_URL,
+                {'ordering': ordering, 'page_size': 250},
+            )
+            ids = [r['id'] for page in pages for r in page['results']]
+
+            self.assertEqual(len(ids), count)
+            self.assertEqual(len(set(ids)), count)
+            self.assertEqual(len(pages), 5)
+
+    def test_previous_pages_through_ties(self):
+        """Test following previous links returns the same pages back."""
+        create_recipes(self.user, 7)
+        pages = self._walk(RECIPES_URL, {'ordering': 'price', 'page_size': 3})
+
+        res = self.client.get(pages[-1]['previous'])
+        self.assertEqual(res.data['results'], pages[-2]['results'])
+        res = self.client.get(res.data['previous'])
+        self.assertEqual(res.data['results'], pages[0]['results'])
+        self.assertIsNone(res.data['previous'])
+        self.assertIsNotNone(res.data['next'])
+
+    def test_invalid_cursor(self):
+        """Test malformed cursors return not found."""
+        for cursor in ['bad', 'eyJwIjpbImEiXSwiciI6ZmFsc2V9', 'W10=']:
+            res = self.client.get(RECIPES_URL, {'cursor': cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tags_walk_all_pages(self):
+        """Test following cursors returns every tag once by name."""
+        names = ['Breakfast', 'Dessert', 'Dinner', 'Lunch', 'Vegan']
+        for name in names:
+            Tag.objects.create(user=self.user, name=name)
+
+        pages = self._walk(TAGS_URL, {'page_size': 2})
+        result = [t['name'] for page in pages for t in page['results']]
+
+        self.assertEqual(result, sorted(names, reverse=True))
@@ -1,25 +1,51 @@
 """
 Tests for recipe API
 """
+import hashlib
+import io
+import json
 import os
+import subprocess
+import sys
 import tempfile
 from decimal import Decimal
+from unittest import skipUnless
+from unittest.mock import patch
+from urllib.parse import (
+    parse_qsl,
+    urlparse,
+)
 
+import msgpack
 from PIL import Image
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.db.models.signals import m2m_changed
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
 from core.models import (
+    ImageBlob,
     Recipe,
     Tag,
     Ingredient
 )
 
+from recipe.images import delete_variants
+from recipe.views import RecipeViewSet
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
@@ -27,6 +53,10 @@ from recipe.serializers import (
 
 
 RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+EXPORT_URL = reverse('recipe:recipe-export')
+IMAGE_UPLOAD = settings.RECIPE_IMAGE_UPLOAD
+TOO_LARGE = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
 
 
 def image_url(recipe_id):
@@ -87,7 +117,7 @@ class PrivateRecipeTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
         
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_limited_to_user(self):
         """Test recipes is limited to authenticated user."""
@@ -103,7 +133,7 @@ class PrivateRecipeTests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_recipe_detail(self):
         """Test get recipe detail."""
@@ -343,6 +373,47 @@ class PrivateRecipeTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(recipe.ingredients.count(), 0)
 
+    def test_create_recipe_with_duplicate_tag_names(self):
+        """Test duplicate names in payload create a single tag."""
+        payload = {
+            'title': 'Toast',
+            'time_minutes': 5,
+            'price': Decimal('1.00'),
+            'tags': [{'name': 'Breakfast'}, {'name': 'Breakfast'}],
+        }
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        tags = Tag.objects.filter(user=self.user, name='Breakfast')
+        self.assertEqual(tags.count(), 1)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertEqual(list(recipe.tags.all()), list(tags))
+
+    def test_create_recipe_sends_m2m_changed(self):
+        """Test assigning tags sends m2m_changed like RelatedManager.add."""
+        received = []
+
+        def receiver(sender, action, instance, pk_set, **kwargs):
+            received.append((action, instance.id, pk_set))
+
+        m2m_changed.connect(receiver, sender=Recipe.tags.through)
+        try:
+            payload = {
+                'title': 'Toast',
+                'time_minutes': 5,
+                'price': Decimal('1.00'),
+                'tags': [{'name': 'Breakfast'}],
+            }
+            res = self.client.post(RECIPES_URL, payload, format='json')
+        finally:
+            m2m_changed.disconnect(receiver, sender=Recipe.tags.through)
+
+        tag = Tag.objects.get(user=self.user, name='Breakfast')
+        self.assertEqual(received, [
+            ('pre_add', res.data['id'], {tag.id}),
+            ('post_add', res.data['id'], {tag.id}),
+        ])
+
     def test_filter_by_tags(self):
         """Test filtering recipes by tags"""
         r1 = create_recipe(user=self.user, title='Pie')
@@ -359,9 +430,9 @@ class PrivateRecipeTests(TestCase):
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
 
     def test_filter_by_ingredients(self):
         """Test filtering recipes by ingredients."""
@@ -380,9 +451,925 @@ class PrivateRecipeTests(TestCase):
         s3 = RecipeSerializer(r3)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filter_by_tags_no_duplicates(self):
+        """Test recipe matching several tags is returned once."""
+        recipe = create_recipe(user=self.user)
+        tag1 = Tag.objects.create(user=self.user, name='Dessert')
+        tag2 = Tag.objects.create(user=self.user, name='Sweets')
+        recipe.tags.add(tag1, tag2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            params = {'tags': f'{tag1.id},{tag2.id}'}
+            res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        sql = ' '.join(q['sql'] for q in ctx.captured_queries).upper()
+        self.assertNotIn('DISTINCT', sql)
+        self.assertIn('EXISTS', sql)
+
+    def test_filter_by_all_tags(self):
+        """Test match=all returns recipes having every tag."""
+        tag1 = Tag.objects.create(user=self.user, name='Dessert')
+        tag2 = Tag.objects.create(user=self.user, name='Sweets')
+        r1 = create_recipe(user=self.user, title='Pie')
+        r1.tags.add(tag1, tag2)
+        r2 = create_recipe(user=self.user, title='Cookie')
+        r2.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [r1.id])
+
+    def test_filter_by_all_ingredients(self):
+        """Test match=all returns recipes having every ingredient."""
+        ing1 = Ingredient.objects.create(user=self.user, name='Flour')
+        ing2 = Ingredient.objects.create(user=self.user, name='Sugar')
+        r1 = create_recipe(user=self.user, title='Pie')
+        r1.ingredients.add(ing1)
+        r2 = create_recipe(user=self.user, title='Cookie')
+        r2.ingredients.add(ing1, ing2)
+
+        params = {'ingredients': f'{ing1.id},{ing2.id}', 'match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [r2.id])
+
+    def test_filter_invalid_match(self):
+        """Test unsupported match value returns error."""
+        res = self.client.get(RECIPES_URL, {'match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_invalid_ids(self):
+        """Test non-integer tag and ingredient ids return error."""
+        for param, value in [('tags', 'abc'), ('ingredients', '1,x')]:
+            res = self.client.get(RECIPES_URL, {param: value})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(param, res.data)
+
+
+class RecipeQueryCountTests(TestCase):
+    """Tests the number of queries used by recipe API."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Dinner')
+        self.ingredient = Ingredient.objects.create(
+            user=self.user,
+            name='Salt',
+        )
+
+    def _create_recipes(self, count):
+        """Create recipes with a tag and an ingredient."""
+        for _ in range(count):
+            recipe = create_recipe(user=self.user)
+            recipe.tags.add(self.tag)
+            recipe.ingredients.add(self.ingredient)
+
+    def _count_queries(self, url):
+        """Return number of queries used for GET request."""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        """Test listing recipes does not query per recipe."""
+        self._create_recipes(2)
+        small = self._count_queries(RECIPES_URL)
+        self._create_recipes(10)
+        large = self._count_queries(RECIPES_URL)
+
+        self.assertEqual(small, large)
+        self.assertEqual(small, 2)
+
+    def test_filtered_list_query_count_is_constant(self):
+        """Test filtered list of recipes does not query per recipe."""
+        url = f'{RECIPES_URL}?tags={self.tag.id}'
+        self._create_recipes(2)
+        small = self._count_queries(url)
+        self._create_recipes(10)
+        large = self._count_queries(url)
+
+        self.assertEqual(small, large)
+
+    def test_detail_query_count(self):
+        """Test retrieving a recipe loads relations with fixed queries."""
+        self._create_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+
+        self.assertEqual(self._count_queries(detail_url(recipe.id)), 3)
+
+    def _count_create_queries(self, count):
+        """Return number of queries to create recipe with attributes."""
+        payload = {
+            'title': 'Stew',
+            'time_minutes': 60,
+            'price': Decimal('8.50'),
+            'tags': [{'name': f'Tag {i}'} for i in range(count)],
+            'ingredients': [{'name': f'Ing {i}'} for i in range(count)],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(RECIPES_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['tags']), count)
+        self.assertEqual(len(res.data['ingredients']), count)
+
+        return len(ctx.captured_queries)
+
+    def test_create_query_count_is_constant(self):
+        """Test creating a recipe does not query per tag or ingredient."""
+        small = self._count_create_queries(2)
+        large = self._count_create_queries(20)
+
+        self.assertEqual(small, large)
+
+    def test_update_query_count_is_constant(self):
+        """Test updating recipe attributes does not query per item."""
+        counts = []
+        for count in [2, 20]:
+            recipe = create_recipe(user=self.user)
+            payload = {
+                'tags': [{'name': f'Tag {i}'} for i in range(count)],
+                'ingredients': [{'name': 'Salt'}, {'name': f'Ing {count}'}],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.patch(
+                    detail_url(recipe.id),
+                    payload,
+                    format='json',
+                )
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+
+class BulkRecipeTests(TestCase):
+    """Tests the bulk recipe endpoint."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+
+    def _payload(self, count, tags=('Dinner',), ingredients=('Salt',)):
+        """Return payload creating count recipes."""
+        return [
+            {
+                'title': f'Recipe {i}',
+                'time_minutes': 10 + i,
+                'price': '2.50',
+                'tags': [{'name': name} for name in tags],
+                'ingredients': [{'name': name} for name in ingredients],
+            }
+            for i in range(count)
+        ]
+
+    def test_bulk_create(self):
+        """Test creating many recipes in one request."""
+        payload = self._payload(3, tags=['Dinner', 'Quick'])
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['title'] for item in res.data],
+            ['Recipe 0', 'Recipe 1', 'Recipe 2'],
+        )
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        for recipe in recipes:
+            self.assertEqual(recipe.tags.count(), 2)
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_bulk_update(self):
+        """Test updating recipes given with an id."""
+        recipe = create_recipe(user=self.user, title='Old')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Old tag'))
+        payload = [
+            {'id': recipe.id, 'title': 'New', 'tags': [{'name': 'Lunch'}]},
+            self._payload(1)[0],
+        ]
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'New')
+        self.assertEqual(recipe.time_minutes, 22)
+        self.assertEqual(
+            [tag.name for tag in recipe.tags.all()],
+            ['Lunch'],
+        )
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    @skipUnlessDBFeature('can_return_rows_from_bulk_insert')
+    def test_bulk_query_count_is_constant(self):
+        """Test bulk create does not query per recipe or attribute."""
+        counts = []
+        for count in [2, 20]:
+            payload = self._payload(
+                count,
+                tags=[f'Tag {count} {i}' for i in range(count)],
+                ingredients=[f'Ingredient {count}'],
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(BULK_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            counts.append(len(ctx.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_per_item_errors(self):
+        """Test invalid items are reported and nothing is saved."""
+        other = create_user(email='other@example.com', password='pass123')
+        other_recipe = create_recipe(user=other)
+        payload = self._payload(1) + [
+            {'title': 'No price', 'time_minutes': 5},
+            {'id': other_recipe.id, 'title': 'Stolen'},
+        ]
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('price', res.data[1])
+        self.assertIn('id', res.data[2])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        other_recipe.refresh_from_db()
+        self.assertEqual(other_recipe.title, 'Sample Title')
+
+    def test_bulk_invalid_ids(self):
+        """Test non integer and repeated ids are per item errors."""
+        recipe = create_recipe(user=self.user)
+        payload = [
+            {'id': [recipe.id], 'title': 'List'},
+            {'id': True, 'title': 'Bool'},
+            {'id': str(recipe.id), 'title': 'String'},
+            {'id': recipe.id, 'title': 'First'},
+            {'id': recipe.id, 'title': 'Second'},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [list(error) for error in res.data],
+            [['id']] * 5,
+        )
+        self.assertIn('more than once', str(res.data[4]['id'][0]))
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Sample Title')
+
+    def test_bulk_max_size(self):
+        """Test too many items are rejected."""
+        with patch.object(RecipeViewSet, 'bulk_max_size', 2):
+            res = self.client.post(BULK_URL, self._payload(3), format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_requires_list(self):
+        """Test payload must be a list."""
+        res = self.client.post(BULK_URL, self._payload(1)[0], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SearchRecipeTests(TestCase):
+    """Tests full text search of recipes."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+
+    def _titles(self, params):
+        """Return titles of listed recipes."""
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_search_ranks_title_above_description(self):
+        """Test title matches come before description matches."""
+        create_recipe(
+            user=self.user,
+            title='Sponge',
+            description='Topped with chocolate',
+        )
+        create_recipe(user=self.user, title='Chocolate cakes')
+        create_recipe(user=self.user, title='Soup')
+        create_recipe(
+            user=create_user(email='o@example.com', password='pw'),
+            title='Chocolate',
+        )
+
+        titles = self._titles({'search': 'chocolate cake'})
+        self.assertEqual(titles, ['Chocolate cakes'])
+
+        titles = self._titles({'search': 'chocolate'})
+        self.assertEqual(titles, ['Chocolate cakes', 'Sponge'])
+
+    def test_search_combined_with_tags(self):
+        """Test search narrows tag filtered recipes."""
+        tag = Tag.objects.create(user=self.user, name='Dessert')
+        r1 = create_recipe(user=self.user, title='Chocolate mousse')
+        r1.tags.add(tag)
+        create_recipe(user=self.user, title='Chocolate sauce')
+        r3 = create_recipe(user=self.user, title='Lemon tart')
+        r3.tags.add(tag)
+
+        titles = self._titles({'search': 'chocolate', 'tags': str(tag.id)})
+
+        self.assertEqual(titles, ['Chocolate mousse'])
+
+    def test_search_vector_updated_on_write(self):
+        """Test changed titles are found without reindexing."""
+        recipe = create_recipe(user=self.user, title='Pancakes')
+        recipe.title = 'Waffles'
+        recipe.save()
+
+        self.assertEqual(self._titles({'search': 'pancakes'}), [])
+        self.assertEqual(self._titles({'search': 'waffle'}), ['Waffles'])
+
+    def test_search_paginates_by_rank(self):
+        """Test ranked results can be paged with cursors."""
+        for number in range(3):
+            create_recipe(
+                user=self.user,
+                title='Bread ' * (number + 1),
+                description='Bread',
+            )
+
+        res = self.client.get(RECIPES_URL, {'search': 'bread', 'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(len(set(ids)), 3)
+        self.assertIsNone(res.data['next'])
+
+    def test_search_pages_through_equal_ranks(self):
+        """Test identical documents are paged once each by id."""
+        recipes = [
+            create_recipe(user=self.user, title='Bread', description='Rye')
+            for _ in range(5)
+        ]
+
+        ids = []
+        res = self.client.get(RECIPES_URL, {'search': 'bread', 'page_size': 2})
+        while True:
+            ids += [recipe['id'] for recipe in res.data['results']]
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertEqual(ids, sorted((r.id for r in recipes), reverse=True))
+
+    @patch('recipe.views.connection')
+    def test_search_fallback_without_postgres(self, patched_connection):
+        """Test search falls back to substring matching elsewhere."""
+        patched_connection.vendor = 'sqlite'
+        create_recipe(user=self.user, title='Apple pie')
+        create_recipe(user=self.user, title='Plum', description='Like apples')
+        create_recipe(user=self.user, title='Soup')
+
+        titles = self._titles({'search': 'apple'})
+
+        self.assertEqual(titles, ['Plum', 'Apple pie'])
+
+
+class RecipeOrderingTests(TestCase):
+    """Tests range filters and sort orders of recipes."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+
+    def _create(self, title, price, time_minutes):
+        """Create and return a recipe of the user."""
+        return create_recipe(
+            user=self.user,
+            title=title,
+            price=Decimal(price),
+            time_minutes=time_minutes,
+        )
+
+    def _titles(self, params):
+        """Return titles of listed recipes."""
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [recipe['title'] for recipe in res.data['results']]
+
+    def test_price_range_sorted_by_price(self):
+        """Test price range filter orders by price by default."""
+        self._create('Steak', '25.00', 30)
+        self._create('Toast', '2.50', 5)
+        self._create('Pasta', '8.00', 20)
+        self._create('Salad', '6.00', 10)
+
+        titles = self._titles({'price_min': '3', 'price_max': '20'})
+
+        self.assertEqual(titles, ['Salad', 'Pasta'])
+
+    def test_time_max_descending(self):
+        """Test time filter with descending time ordering."""
+        self._create('Stew', '5.00', 120)
+        self._create('Toast', '1.00', 5)
+        self._create('Soup', '3.00', 40)
+
+        titles = self._titles({'time_max': '60', 'ordering': '-time_minutes'})
+
+        self.assertEqual(titles, ['Soup', 'Toast'])
+
+    def test_ordering_by_title(self):
+        """Test recipes can be ordered by title."""
+        for title in ['Bread', 'Apple pie', 'Cake']:
+            self._create(title, '1.00', 10)
+
+        self.assertEqual(
+            self._titles({'ordering': '-title'}),
+            ['Cake', 'Bread', 'Apple pie'],
+        )
+
+    def test_ordering_pages_through_ties(self):
+        """Test cursor pages cover equal prices once, in order."""
+        recipes = [
+            self._create(f'Recipe {n}', price, 10)
+            for n, price in enumerate(['3.00', '1.00', '3.00', '3.00', '2.00'])
+        ]
+
+        ids = []
+        res = self.client.get(
+            RECIPES_URL,
+            {'ordering': '-price', 'page_size': 2},
+        )
+        while True:
+            ids += [recipe['id'] for recipe in res.data['results']]
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        expected = sorted(recipes, key=lambda r: (r.price, r.id), reverse=True)
+        self.assertEqual(ids, [recipe.id for recipe in expected])
+
+    def test_unsupported_requests_rejected(self):
+        """Test invalid values and combinations return 400."""
+        invalid = [
+            {'ordering': 'description'},
+            {'price_min': 'cheap'},
+            {'price_max': 'NaN'},
+            {'time_max': '1.5'},
+            {'price_min': '1', 'time_max': '10'},
+            {'price_min': '1', 'ordering': 'time_minutes'},
+            {'search': 'soup', 'ordering': 'price'},
+        ]
+        for params in invalid:
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(
+                res.status_code,
+                status.HTTP_400_BAD_REQUEST,
+                params,
+            )
+
+
+class SparseFieldsetTests(TestCase):
+    """Tests selecting recipe fields with fields and omit."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+        for number in range(3):
+            recipe = create_recipe(user=self.user, title=f'Recipe {number}')
+            recipe.tags.add(
+                Tag.objects.get_or_create(user=self.user, name='Dinner')[0]
+            )
+
+    def test_fields_skip_relations_and_columns(self):
+        """Test unrequested relations and columns are not queried."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [set(recipe) for recipe in res.data['results']],
+            [{'id', 'title'}] * 3,
+        )
+        self.assertEqual(len(queries), 1)
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('"title"', sql)
+        self.assertNotIn('"price"', sql)
+        self.assertNotIn('"image_variants"', sql)
+
+    def test_omit_relation(self):
+        """Test omitting tags skips only their prefetch."""
+        with self.assertNumQueries(2):
+            res = self.client.get(RECIPES_URL, {'omit': 'tags'})
+
+        self.assertNotIn('tags', res.data['results'][0])
+        self.assertIn('ingredients', res.data['results'][0])
+        self.assertIn('price', res.data['results'][0])
+
+    def test_retrieve_fields(self):
+        """Test detail fields can be selected."""
+        recipe = Recipe.objects.filter(user=self.user).first()
+
+        res = self.client.get(
+            detail_url(recipe.id),
+            {'fields': 'description,tags'},
+        )
+
+        self.assertEqual(set(res.data), {'description', 'tags'})
+        self.assertEqual(res.data['tags'][0]['name'], 'Dinner')
+
+    def test_fields_with_ordering_pages(self):
+        """Test cursors of sparse pages need no deferred columns."""
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, {
+                'fields': 'title',
+                'ordering': 'price',
+                'page_size': 2,
+            })
+
+        res = self.client.get(res.data['next'])
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_export_fields(self):
+        """Test export honours selected fields."""
+        res = self.client.get(EXPORT_URL, {'fields': 'id'})
+        lines = b''.join(res.streaming_content).decode().splitlines()
+
+        self.assertEqual(
+            [set(json.loads(line)) for line in lines],
+            [{'id'}] * 3,
+        )
+
+    def test_invalid_fields_rejected(self):
+        """Test unknown or empty selections return 400."""
+        for params in [
+            {'fields': 'id,secret'},
+            {'omit': 'description'},
+            {'fields': 'id', 'omit': 'id'},
+        ]:
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(
+                res.status_code,
+                status.HTTP_400_BAD_REQUEST,
+                params,
+            )
+
+    def test_fields_ignored_for_writes(self):
+        """Test field selection does not skip validation of writes."""
+        res = self.client.post(
+            f'{RECIPES_URL}?fields=id',
+            {'title': 'New', 'time_minutes': 5, 'price': '1.00'},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn('title', res.data)
+
+
+class FastListParityTests(TestCase):
+    """Tests the values() list path renders exactly like the serializer."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ['Vegan', 'Dinner', 'Ünïcode "quoted"']
+        ]
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        for number in range(7):
+            recipe = create_recipe(
+                user=self.user,
+                title=f'Recipe {number} soup' if number % 2 else 'Pie',
+                price=Decimal(f'{number}.{number}0'),
+                time_minutes=number * 7,
+                description='Hearty soup' if number % 3 else '',
+                image_variants={'128': f'variants/r{number}.jpg'}
+                if number % 2 else {},
+            )
+            recipe.tags.add(*tags[:number % 4])
+            if number % 2:
+                recipe.ingredients.add(salt)
+
+    def _content(self, fast, params):
+        """Return rendered list response body."""
+        with patch.object(RecipeViewSet, 'fast_list', fast):
+            res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return res.content
+
+    def test_identical_output(self):
+        """Test both list paths return the same bytes."""
+        queries = [
+            {},
+            {'page_size': 3},
+            {'ordering': 'price', 'page_size': 2},
+            {'search': 'soup'},
+            {'fields': 'title,tags,image_variants'},
+            {'omit': 'tags,price'},
+            {'price_min': '2', 'time_max': ''},
+        ]
+        for params in queries:
+            self.assertEqual(
+                self._content(True, params),
+                self._content(False, params),
+                params,
+            )
+
+    def test_identical_next_page(self):
+        """Test cursors of the fast path lead to identical pages."""
+        with patch.object(RecipeViewSet, 'fast_list', True):
+            res = self.client.get(RECIPES_URL, {'page_size': 4})
+        params = dict(parse_qsl(urlparse(res.data['next']).query))
+
+        self.assertEqual(
+            self._content(True, params),
+            self._content(False, params),
+        )
+
+
+class NormalizedListTests(TestCase):
+    """Tests side-loaded tags and ingredients with ?format=normalized."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.dinner = Tag.objects.create(user=self.user, name='Dinner')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.r1 = create_recipe(user=self.user, title='Soup')
+        self.r1.tags.add(self.vegan, self.dinner)
+        self.r1.ingredients.add(self.salt)
+        self.r2 = create_recipe(user=self.user, title='Pie')
+        self.r2.tags.add(self.vegan)
+
+    def test_normalized_list(self):
+        """Test recipes carry ids and the page carries each item once."""
+        res = self.client.get(RECIPES_URL, {'format': 'normalized'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        data = json.loads(res.content)
+        self.assertEqual(
+            [recipe['tag_ids'] for recipe in data['results']],
+            [[self.vegan.id], [self.vegan.id, self.dinner.id]],
+        )
+        self.assertEqual(
+            [recipe['ingredient_ids'] for recipe in data['results']],
+            [[], [self.salt.id]],
+        )
+        self.assertNotIn('tags', data['results'][0])
+        self.assertEqual(data['tags'], {
+            str(self.vegan.id): {'id': self.vegan.id, 'name': 'Vegan'},
+            str(self.dinner.id): {'id': self.dinner.id, 'name': 'Dinner'},
+        })
+        self.assertEqual(data['ingredients'], {
+            str(self.salt.id): {'id': self.salt.id, 'name': 'Salt'},
+        })
+
+    def test_fast_and_serializer_paths_identical(self):
+        """Test both list paths return the same normalized bytes."""
+        contents = []
+        for fast in (True, False):
+            with patch.object(RecipeViewSet, 'fast_list', fast):
+                res = self.client.get(RECIPES_URL, {'format': 'normalized'})
+            contents.append(res.content)
+
+        self.assertEqual(contents[0], contents[1])
+
+    def test_sparse_fields(self):
+        """Test only selected relations are side-loaded."""
+        res = self.client.get(
+            RECIPES_URL,
+            {'format': 'normalized', 'fields': 'title,tags'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'][1],
+            {'title': 'Soup', 'tag_ids': [self.vegan.id, self.dinner.id]},
+        )
+        self.assertIn('tags', res.data)
+        self.assertNotIn('ingredients', res.data)
+
+    def test_msgpack(self):
+        """Test the normalized representation can be sent as MessagePack."""
+        res = self.client.get(
+            RECIPES_URL,
+            {'format': 'normalized'},
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(res.content, strict_map_key=False)
+        self.assertEqual(data['tags'][self.dinner.id]['name'], 'Dinner')
+
+    def test_next_page_keeps_format(self):
+        """Test cursor links keep the normalized format."""
+        res = self.client.get(
+            RECIPES_URL,
+            {'format': 'normalized', 'page_size': 1},
+        )
+        params = dict(parse_qsl(urlparse(res.data['next']).query))
+
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.data['results'][0]['tag_ids'], [
+            self.vegan.id,
+            self.dinner.id,
+        ])
+        self.assertEqual(list(res.data['tags']), [
+            self.vegan.id,
+            self.dinner.id,
+        ])
+
+    def test_renderer_formats_unchanged(self):
+        """Test format still selects renderers and is list only."""
+        res = self.client.get(RECIPES_URL, {'format': 'json'})
+        detail = self.client.get(
+            detail_url(self.r1.id),
+            {'format': 'normalized'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('tags', res.data['results'][0])
+        self.assertEqual(detail.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MessagePackRecipeTests(TestCase):
+    """Tests exchanging recipes as MessagePack."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+
+    def test_list_as_msgpack(self):
+        """Test list holds the same data as JSON with prices as strings."""
+        recipe = create_recipe(user=self.user, price=Decimal('5.25'))
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Crème'))
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='application/msgpack')
+        json_res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        data = msgpack.unpackb(res.content)
+        self.assertEqual(data, json.loads(json_res.content))
+        self.assertEqual(data['results'][0]['price'], '5.25')
+        self.assertLess(len(res.content), len(json_res.content))
+
+    def test_create_from_msgpack(self):
+        """Test creating a recipe from a MessagePack body."""
+        payload = {
+            'title': 'Pie',
+            'time_minutes': 30,
+            'price': '5.25',
+            'tags': [{'name': 'Dessert'}],
+        }
+
+        res = self.client.post(
+            RECIPES_URL,
+            msgpack.packb(payload),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.price, Decimal('5.25'))
+        self.assertEqual(
+            list(recipe.tags.values_list('name', flat=True)),
+            ['Dessert'],
+        )
+        self.assertEqual(msgpack.unpackb(res.content)['id'], recipe.id)
+
+    def test_invalid_msgpack(self):
+        """Test a malformed MessagePack body returns 400."""
+        res = self.client.post(
+            RECIPES_URL,
+            b'\x92\x01',
+            content_type='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportRecipeTests(TestCase):
+    """Tests streaming export of recipes."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+
+    def _export(self, params=None):
+        """Return response and parsed lines of export."""
+        res = self.client.get(EXPORT_URL, params)
+        content = b''.join(res.streaming_content).decode()
+
+        return res, [json.loads(line) for line in content.splitlines()]
+
+    def test_export_streams_ndjson(self):
+        """Test export returns every recipe as a JSON line."""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+        recipes[0].tags.add(tag)
+        create_recipe(user=create_user(email='o@example.com', password='pw'))
+
+        with patch.object(RecipeViewSet, 'export_chunk_size', 2):
+            res, lines = self._export()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        expected = RecipeDetailSerializer(
+            Recipe.objects.filter(user=self.user).order_by('-id'),
+            many=True,
+        )
+        self.assertEqual(lines, json.loads(json.dumps(expected.data)))
+
+    def test_export_queries_per_chunk(self):
+        """Test relations are prefetched once per chunk."""
+        for _ in range(5):
+            create_recipe(user=self.user)
+
+        with patch.object(RecipeViewSet, 'export_chunk_size', 2):
+            with CaptureQueriesContext(connection) as ctx:
+                res, lines = self._export()
+
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(len(ctx.captured_queries), 1 + 3 * 2)
+
+    def test_export_applies_filters(self):
+        """Test export honours recipe filters."""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag)
+        create_recipe(user=self.user)
+
+        res, lines = self._export({'tags': str(tag.id)})
+
+        self.assertEqual([line['id'] for line in lines], [recipe.id])
+
+    def test_export_lines_match_api_json(self):
+        """Test lines are rendered like API responses."""
+        recipe = create_recipe(user=self.user, title='Crème brûlée')
+
+        res = self.client.get(EXPORT_URL)
+        content = b''.join(res.streaming_content)
+
+        detail = self.client.get(
+            detail_url(recipe.id),
+            HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(content, detail.content + b'\n')
+        self.assertIn('Crème brûlée'.encode(), content)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+class ExportCursorTests(TransactionTestCase):
+    """Tests the server-side cursor of the export outside a transaction."""
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='pass123')
+        self.client.force_authenticate(self.user)
+
+    def test_export_cursor_not_held(self):
+        """Test rows are fetched from a cursor declared WITHOUT HOLD."""
+        for _ in range(3):
+            create_recipe(user=self.user)
+
+        with patch.object(RecipeViewSet, 'export_chunk_size', 1):
+            res = self.client.get(EXPORT_URL)
+            lines = iter(res.streaming_content)
+            next(lines)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT is_holdable FROM pg_cursors;')
+                holdable = [row[0] for row in cursor.fetchall()]
+            remaining = list(lines)
+        res.close()
+
+        self.assertEqual(holdable, [False])
+        self.assertEqual(len(remaining), 2)
 
 
 class ImageUploadTest(TestCase):
@@ -397,8 +1384,24 @@ class ImageUploadTest(TestCase):
         self.recipe = create_recipe(user=self.user)
 
     def tearDown(self):
+        self.recipe.refresh_from_db()
+        delete_variants(self.recipe.image_variants)
         self.recipe.image.delete()
 
+    def _upload(self, size=(10, 10), exif=None):
+        """Upload a JPEG image of size to the recipe."""
+        url = image_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', size)
+            params = {'exif': exif.tobytes()} if exif else {}
+            img.save(image_file, format='JPEG', **params)
+            image_file.seek(0)
+            return self.client.post(
+                url,
+                {'image': image_file},
+                format='multipart',
+            )
+
     def test_upload_image(self):
         """Test uploading an image to a recipe."""
         url = image_url(self.recipe.id)
@@ -420,4 +1423,222 @@ class ImageUploadTest(TestCase):
         payload = {'image': 'notanomage'}
         res = self.client.post(url, payload, format='multipart')
         
-        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_IMAGE_WORKERS=0)
+    def test_upload_image_generates_variants(self):
+        """Test resized, orientation corrected variants are generated."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self._upload(size=(2000, 1000), exif=exif)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_variants'], {})
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            set(self.recipe.image_variants),
+            {'128', '512', '1024'},
+        )
+        with default_storage.open(self.recipe.image_variants['128']) as f:
+            self.assertEqual(Image.open(f).size, (64, 128))
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertTrue(
+            res.data['image_variants']['512'].startswith('http://testserver')
+        )
+
+    @override_settings(RECIPE_IMAGE_WORKERS=0)
+    def test_new_upload_replaces_variants(self):
+        """Test uploading again removes the old variants."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload()
+        self.recipe.refresh_from_db()
+        old_variants = self.recipe.image_variants
+        old_image = self.recipe.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(size=(20, 20))
+
+        self.recipe.refresh_from_db()
+        self.assertNotEqual(self.recipe.image_variants, old_variants)
+        for path in old_variants.values():
+            self.assertFalse(default_storage.exists(path))
+        default_storage.delete(old_image)
+
+    @patch('recipe.images._get_executor')
+    def test_upload_queues_variants_in_worker(self, patched_executor):
+        """Test variants are generated outside the request."""
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self._upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        patched_executor.return_value.submit.assert_called_once()
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, {})
+
+    @patch('recipe.images._get_executor')
+    def test_new_upload_retries_failed_variants(self, patched_executor):
+        """Test a new image clears the failure mark of the old one."""
+        Recipe.objects.filter(id=self.recipe.id).update(
+            image_variants_failed=True,
+        )
+
+        res = self._upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image_variants_failed)
+
+    def _post_file(self, content, name='image.jpg'):
+        """Post raw bytes as the recipe image."""
+        return self.client.post(
+            image_url(self.recipe.id),
+            {'image': SimpleUploadedFile(name, content)},
+            format='multipart',
+        )
+
+    def _jpeg_bytes(self, size=(10, 10), noise=False):
+        """Return bytes of a JPEG image."""
+        if noise:
+            pixels = os.urandom(size[0] * size[1] * 3)
+            img = Image.frombytes('RGB', size, pixels)
+        else:
+            img = Image.new('RGB', size)
+        buffer = io.BytesIO()
+        img.save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+    @override_settings(RECIPE_IMAGE_UPLOAD={**IMAGE_UPLOAD, 'MAX_BYTES': 1000})
+    def test_declared_body_too_large_rejected(self):
+        """Test request larger than the limit is rejected before parsing."""
+        res = self._post_file(self._jpeg_bytes((300, 300), noise=True))
+
+        self.assertEqual(res.status_code, TOO_LARGE)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_UPLOAD={**IMAGE_UPLOAD, 'MAX_BYTES': 1000})
+    def test_streamed_file_too_large_rejected(self):
+        """Test file over the limit is rejected while streaming."""
+        content = self._jpeg_bytes((60, 60), noise=True)
+        self.assertGreater(len(content), 1000)
+
+        res = self._post_file(content)
+
+        self.assertEqual(res.status_code, TOO_LARGE)
+        self.assertIn('1000 bytes', res.data['image'][0])
+
+    def test_non_image_rejected(self):
+        """Test file without an image signature is rejected."""
+        res = self._post_file(b'<?php echo "not an image"; ?>' * 10)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
+    @override_settings(RECIPE_IMAGE_UPLOAD={**IMAGE_UPLOAD, 'MAX_PIXELS': 50})
+    def test_too_many_pixels_rejected(self):
+        """Test image with too many pixels is rejected before decoding."""
+        with patch('recipe.uploads.verify_in_subprocess') as verify:
+            res = self._post_file(self._jpeg_bytes((10, 10)))
+
+        self.assertEqual(res.status_code, TOO_LARGE)
+        verify.assert_not_called()
+
+    def test_truncated_image_rejected(self):
+        """Test image failing to decode in the verifier is rejected."""
+        content = self._jpeg_bytes((200, 200), noise=True)
+
+        res = self._post_file(content[:len(content) // 2])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @patch('recipe.uploads.subprocess.run')
+    def test_slow_decode_rejected(self, patched_run):
+        """Test image taking too long to verify is rejected."""
+        patched_run.side_effect = subprocess.TimeoutExpired('python', 5)
+
+        res = self._post_file(self._jpeg_bytes())
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('too long', res.data['image'][0])
+
+    @patch('sys.executable', '/usr/sbin/uwsgi')
+    @override_settings(RECIPE_IMAGE_UPLOAD={
+        **IMAGE_UPLOAD,
+        'VERIFY_PYTHON': sys.executable,
+    })
+    def test_verify_uses_configured_python(self):
+        """Test the decode check does not run sys.executable, e.g. uwsgi."""
+        with patch(
+            'recipe.uploads.subprocess.run',
+            wraps=subprocess.run,
+        ) as patched_run:
+            res = self._post_file(self._jpeg_bytes())
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            patched_run.call_args[0][0][0],
+            settings.RECIPE_IMAGE_UPLOAD['VERIFY_PYTHON'],
+        )
+
+    def test_same_image_stored_once(self):
+        """Test identical uploads share one content addressed blob."""
+        content = self._jpeg_bytes()
+        other = create_recipe(user=self.user)
+        self._post_file(content)
+        res = self.client.post(
+            image_url(other.id),
+            {'image': SimpleUploadedFile('copy.jpg', content)},
+            format='multipart',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        other.refresh_from_db()
+        digest = hashlib.sha256(content).hexdigest()
+        self.assertEqual(self.recipe.image.name, other.image.name)
+        self.assertEqual(
+            self.recipe.image.name,
+            f'uploads/recipe/blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg',
+        )
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.sha256, digest)
+        self.assertEqual(blob.ref_count, 2)
+
+    def test_blob_deleted_with_last_reference(self):
+        """Test blob file is deleted once no recipe uses it."""
+        content = self._jpeg_bytes()
+        first = create_recipe(user=self.user)
+        second = create_recipe(user=self.user)
+        for recipe in (first, second):
+            self.client.post(
+                image_url(recipe.id),
+                {'image': SimpleUploadedFile('image.jpg', content)},
+                format='multipart',
+            )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        name = first.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(ImageBlob.objects.get().ref_count, 1)
+        self.assertTrue(default_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(ImageBlob.objects.exists())
+        self.assertFalse(default_storage.exists(name))
+
+    @override_settings(RECIPE_IMAGE_STORAGE='uuid')
+    def test_uuid_storage_mode(self):
+        """Test uploads get unique names when not stored by content."""
+        res = self._post_file(self._jpeg_bytes())
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertNotIn('blobs', self.recipe.image.name)
+        self.assertFalse(ImageBlob.objects.exists())
@@ -0,0 +1,280 @@
+"""
+Tests for the recipe API response cache.
+"""
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+)
+from rest_framework.request import Request
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.caching import (
+    normalize_params,
+    response_cache,
+)
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+RESPONSE_CACHE_ENABLED = {
+    'ENABLED': True,
+    'CACHE': 'responses',
+    'TIMEOUT': None,
+    'SINGLE_FLIGHT_TIMEOUT': 10,
+    'SINGLE_FLIGHT_POLL_INTERVAL': 0.01,
+}
+
+
+def detail_url(recipe_id):
+    """Create and return recipe detail url."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a recipe."""
+    defaults = {
+        'title': 'Sample Title',
+        'time_minutes': 22,
+        'price': Decimal('3.45'),
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class NormalizeParamsTests(SimpleTestCase):
+    """Tests normalizing query parameters for cache keys."""
+
+    def _params(self, query):
+        """Return query params of a GET request."""
+        return Request(APIRequestFactory().get(f'/{query}')).query_params
+
+    def test_order_and_duplicates_ignored(self):
+        """Test equivalent queries produce the same key part."""
+        first = normalize_params(self._params('?tags=2,1&ingredients=3'))
+        second = normalize_params(self._params('?ingredients=3&tags=1, 2,1'))
+
+        self.assertEqual(first, second)
+
+    def test_assigned_only_normalized(self):
+        """Test assigned_only is compared as integer."""
+        self.assertEqual(
+            normalize_params(self._params('?assigned_only=01')),
+            normalize_params(self._params('?assigned_only=1')),
+        )
+
+
+@override_settings(RESPONSE_CACHE=RESPONSE_CACHE_ENABLED)
+class SingleFlightTests(SimpleTestCase):
+    """Tests concurrent misses computing a value once."""
+
+    def setUp(self):
+        caches['responses'].clear()
+        response_cache.reset_stats()
+
+    def test_concurrent_misses_compute_once(self):
+        """Test only one of concurrent misses runs compute."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 1}
+
+        results = []
+
+        def worker():
+            results.append(response_cache.get_or_set(1, 'key', compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'value': 1}] * 4)
+        self.assertEqual(response_cache.stats(), {'hits': 3, 'misses': 1})
+
+    def test_waits_for_lock_held_by_other_process(self):
+        """Test a miss waits for a value computed under the cache lock."""
+        cache = caches['responses']
+        cache.add('key:lock', 1, 10)
+
+        def other_process():
+            time.sleep(0.1)
+            cache.set('key', {'value': 2})
+            cache.delete('key:lock')
+
+        thread = threading.Thread(target=other_process)
+        thread.start()
+        result = response_cache.get_or_set(1, 'key', lambda: {'value': 1})
+        thread.join()
+
+        self.assertEqual(result, {'value': 2})
+        self.assertEqual(response_cache.stats(), {'hits': 1, 'misses': 0})
+
+    def test_computes_when_lock_released_without_value(self):
+        """Test a miss computes itself when the leader cached nothing."""
+        cache = caches['responses']
+        cache.add('key:lock', 1, 10)
+        timer = threading.Timer(0.1, cache.delete, ['key:lock'])
+        timer.start()
+
+        result = response_cache.get_or_set(1, 'key', lambda: {'value': 1})
+        timer.join()
+
+        self.assertEqual(result, {'value': 1})
+        self.assertEqual(response_cache.stats(), {'hits': 0, 'misses': 1})
+        self.assertIsNone(cache.get('key:lock'))
+
+
+@override_settings(RESPONSE_CACHE=RESPONSE_CACHE_ENABLED)
+class ResponseCacheApiTests(TestCase):
+    """Tests caching recipe API responses."""
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['responses'].clear()
+        response_cache.reset_stats()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        """Test repeated list request does not query the database."""
+        create_recipe(self.user)
+        res = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(RECIPES_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(response_cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_query_params_in_key(self):
+        """Test different filters are cached separately."""
+        r1 = create_recipe(self.user, title='Pie')
+        tag = Tag.objects.create(user=self.user, name='Dessert')
+        r1.tags.add(tag)
+        create_recipe(self.user, title='Soup')
+
+        res_all = self.client.get(RECIPES_URL)
+        res_tag = self.client.get(RECIPES_URL, {'tags': str(tag.id)})
+
+        self.assertEqual(len(res_all.data['results']), 2)
+        self.assertEqual(len(res_tag.data['results']), 1)
+
+    def test_save_evicts(self):
+        """Test saving a recipe evicts cached responses."""
+        recipe = create_recipe(self.user)
+        self.client.get(detail_url(recipe.id))
+        recipe.title = 'New title'
+        recipe.save()
+
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.data['title'], 'New title')
+        self.assertEqual(response_cache.stats()['hits'], 0)
+
+    def test_m2m_change_evicts(self):
+        """Test adding an ingredient evicts cached responses."""
+        recipe = create_recipe(self.user)
+        self.client.get(RECIPES_URL)
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe.ingredients.add(ingredient)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            res.data['results'][0]['ingredients'],
+            [{'id': ingredient.id, 'name': 'Salt'}],
+        )
+
+    def test_delete_evicts(self):
+        """Test deleting a tag evicts cached tag list."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAGS_URL)
+        tag.delete()
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_other_user_not_served(self):
+        """Test cached responses are not shared between users."""
+        create_recipe(self.user)
+        self.client.get(RECIPES_URL)
+        other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_errors_not_cached(self):
+        """Test error responses are not cached."""
+        res = self.client.get(detail_url(999))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(response_cache.stats()['misses'], 1)
+        recipe = create_recipe(self.user)
+        res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_file_based_backend(self):
+        """Test responses can be cached in a file based backend."""
+        with tempfile.TemporaryDirectory() as location:
+            file_caches = {
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.locmem.'
+                               'LocMemCache',
+                },
+                'responses': {
+                    'BACKEND': 'django.core.cache.backends.filebased.'
+                               'FileBasedCache',
+                    'LOCATION': location,
+                },
+            }
+            with override_settings(CACHES=file_caches):
+                create_recipe(self.user)
+                self.client.get(RECIPES_URL)
+                with self.assertNumQueries(0):
+                    res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    @override_settings(RESPONSE_CACHE={**RESPONSE_CACHE_ENABLED,
+                                       'ENABLED': False})
+    def test_disabled_by_default_setting(self):
+        """Test responses are not cached when disabled."""
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(response_cache.stats(), {'hits': 0, 'misses': 0})
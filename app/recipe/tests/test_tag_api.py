@@ -1,8 +1,11 @@
 """Test for the tag API."""
 from decimal import Decimal
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -13,8 +16,10 @@ from core.models import (
     Recipe
     )
 from recipe.serializers import TagSerializer
+from recipe.views import trigram_installed
 
 TAGS_URL = reverse('recipe:tag-list')
+AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
 
 
 def detail_url(tag_id):
@@ -64,7 +69,7 @@ class PrivateTagsTests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tag_limited_to_user(self):
         """Test tag is limited to authenticated user."""
@@ -75,9 +80,9 @@ class PrivateTagsTests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
 
     def test_update_tag(self):
         """Test partial updating tag."""
@@ -90,6 +95,17 @@ class PrivateTagsTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_duplicate_name(self):
+        """Test renaming tag to an existing name returns error."""
+        Tag.objects.create(user=self.user, name='Dessert')
+        tag = Tag.objects.create(user=self.user, name='After Dinner')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'After Dinner')
+
     def test_delete_tag(self):
         """"Test deleting tag."""
         tag = Tag.objects.create(user=self.user, name='Vegan')
@@ -117,8 +133,8 @@ class PrivateTagsTests(TestCase):
         s2 = TagSerializer(tag2)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filter_tags_unique(self):
         """Test filtering tags unique assigned to a few recipes."""
@@ -142,4 +158,109 @@ class PrivateTagsTests(TestCase):
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_tags_assigned_without_join(self):
+        """Test assigned_only uses EXISTS instead of a distinct join."""
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=39,
+            price=Decimal('45.56')
+        )
+        recipe.tags.add(tag)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn('EXISTS', sql)
+        self.assertNotIn('DISTINCT', sql)
+
+    def test_tags_with_counts(self):
+        """Test tags are listed with their number of recipes."""
+        lunch = Tag.objects.create(user=self.user, name='Lunch')
+        dinner = Tag.objects.create(user=self.user, name='Dinner')
+        for title in ['Soup', 'Pie']:
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=39,
+                price=Decimal('45.56')
+            )
+            recipe.tags.add(lunch)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, {'with_counts': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [
+            {'id': lunch.id, 'name': 'Lunch', 'recipe_count': 2},
+            {'id': dinner.id, 'name': 'Dinner', 'recipe_count': 0},
+        ])
+
+        res = self.client.get(TAGS_URL, {'with_counts': 1, 'assigned_only': 1})
+        self.assertEqual(
+            [tag['name'] for tag in res.data['results']],
+            ['Lunch'],
+        )
+
+    def test_invalid_flag(self):
+        """Test non numeric flags are rejected."""
+        res = self.client.get(TAGS_URL, {'with_counts': 'yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def _names(self, params):
+        """Return names suggested by autocomplete."""
+        res = self.client.get(AUTOCOMPLETE_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return [tag['name'] for tag in res.data]
+
+    def test_autocomplete_prefix(self):
+        """Test prefix matches are suggested, shortest first."""
+        for name in ['Tomato soup', 'tomato', 'Potato', 'Tomatillo']:
+            Tag.objects.create(user=self.user, name=name)
+        Tag.objects.create(user=create_user(email='o@example.com'), name='Tom')
+
+        self.assertEqual(
+            self._names({'q': 'TOMA'}),
+            ['tomato', 'Tomatillo', 'Tomato soup'],
+        )
+
+    def test_autocomplete_limit_capped(self):
+        """Test number of suggestions is limited."""
+        for number in range(30):
+            Tag.objects.create(user=self.user, name=f'Tag {number}')
+
+        self.assertEqual(len(self._names({'q': 'tag'})), 10)
+        self.assertEqual(len(self._names({'q': 'tag', 'limit': 3})), 3)
+        self.assertEqual(len(self._names({'q': 'tag', 'limit': 500})), 20)
+
+    def test_autocomplete_requires_query(self):
+        """Test an empty query is rejected."""
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': ' '})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_misspelling(self):
+        """Test similar names follow prefix matches."""
+        if not trigram_installed():
+            self.skipTest('pg_trgm extension is not available')
+        for name in ['Vegetarian', 'Vegan', 'Dessert']:
+            Tag.objects.create(user=self.user, name=name)
+
+        self.assertEqual(self._names({'q': 'vegitarian'}), ['Vegetarian'])
+
+    @patch('recipe.views.trigram_installed', return_value=False)
+    def test_autocomplete_substring_fallback(self, patched_installed):
+        """Test substring matches follow prefix matches without pg_trgm."""
+        for name in ['Pasta', 'Fresh pasta', 'Pastry', 'Rice']:
+            Tag.objects.create(user=self.user, name=name)
+
+        self.assertEqual(
+            self._names({'q': 'past'}),
+            ['Pasta', 'Pastry', 'Fresh pasta'],
+        )
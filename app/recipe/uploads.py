@@ -0,0 +1,176 @@
+"""
+Streaming upload handling for recipe images.
+"""
+import hashlib
+import subprocess
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    SkipFile,
+    TemporaryFileUploadHandler,
+)
+
+IMAGE_SIGNATURES = {
+    'JPEG': [b'\xff\xd8\xff'],
+    'PNG': [b'\x89PNG\r\n\x1a\n'],
+    'GIF': [b'GIF87a', b'GIF89a'],
+    'WEBP': [b'RIFF'],
+}
+
+# Decodes the image in a child process whose memory and CPU time are
+# limited, so a hostile file cannot exhaust the web worker.
+VERIFY_SCRIPT = '''
+import resource
+import sys
+
+path, memory, seconds, max_pixels = sys.argv[1:]
+resource.setrlimit(resource.RLIMIT_AS, (int(memory), int(memory)))
+resource.setrlimit(resource.RLIMIT_CPU, (int(seconds), int(seconds)))
+
+from PIL import Image
+
+Image.MAX_IMAGE_PIXELS = int(max_pixels)
+with Image.open(path) as image:
+    image.load()
+'''
+
+
+class ImageRejected(Exception):
+    """Uploaded image is not acceptable."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _get_setting(name):
+    """Return recipe image upload setting."""
+    return settings.RECIPE_IMAGE_UPLOAD[name]
+
+
+def check_content_length(meta):
+    """Reject a request whose declared body cannot hold a valid image."""
+    max_bytes = _get_setting('MAX_BYTES')
+    try:
+        length = int(meta.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    # Leave room for the multipart boundaries and headers.
+    if length > max_bytes + 64 * 1024:
+        raise ImageRejected(
+            f'Image must be at most {max_bytes} bytes.',
+            status_code=413,
+        )
+
+
+def check_signature(header):
+    """Raise ImageRejected unless header starts like an allowed image."""
+    for fmt, signatures in IMAGE_SIGNATURES.items():
+        if any(header.startswith(signature) for signature in signatures):
+            if fmt == 'WEBP' and header[8:12] != b'WEBP':
+                continue
+            return fmt
+
+    raise ImageRejected('Upload a valid JPEG, PNG, GIF or WEBP image.')
+
+
+def check_dimensions(path):
+    """Check format and pixel count reading only the image header."""
+    max_pixels = _get_setting('MAX_PIXELS')
+    try:
+        with Image.open(path) as image:
+            fmt = image.format
+            width, height = image.size
+    except (Image.DecompressionBombError, OSError, ValueError):
+        raise ImageRejected('Upload a valid image.')
+
+    if fmt not in IMAGE_SIGNATURES:
+        raise ImageRejected('Upload a valid JPEG, PNG, GIF or WEBP image.')
+    if width * height > max_pixels:
+        raise ImageRejected(
+            f'Image must have at most {max_pixels} pixels.',
+            status_code=413,
+        )
+
+
+def verify_in_subprocess(path):
+    """Fully decode the image in a resource limited child process."""
+    args = [
+        _get_setting('VERIFY_PYTHON'), '-c', VERIFY_SCRIPT, path,
+        str(_get_setting('VERIFY_MEMORY')),
+        str(_get_setting('VERIFY_TIMEOUT')),
+        str(_get_setting('MAX_PIXELS')),
+    ]
+    try:
+        result = subprocess.run(
+            args,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=_get_setting('VERIFY_TIMEOUT'),
+        )
+    except subprocess.TimeoutExpired:
+        raise ImageRejected('Image took too long to decode.')
+    if result.returncode != 0:
+        raise ImageRejected('Upload a valid image.')
+
+
+class RecipeImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to disk, rejecting bad images as early as possible.
+
+    The first rejection is kept in `error` and the file is dropped, so the
+    view can report it instead of the generic missing file error. Accepted
+    files carry the sha256 digest of their content.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.error = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header = b''
+        self.sha256 = hashlib.sha256()
+
+    def _reject(self, exc):
+        """Remember the rejection and skip the rest of the file."""
+        if self.error is None:
+            self.error = exc
+        self.file.close()
+        raise SkipFile()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        max_bytes = _get_setting('MAX_BYTES')
+        if self.received > max_bytes:
+            self._reject(ImageRejected(
+                f'Image must be at most {max_bytes} bytes.',
+                status_code=413,
+            ))
+        if len(self.header) < 12:
+            self.header += raw_data[:12 - len(self.header)]
+            if len(self.header) == 12:
+                try:
+                    check_signature(self.header)
+                except ImageRejected as exc:
+                    self._reject(exc)
+
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        try:
+            check_signature(self.header)
+            check_dimensions(file.temporary_file_path())
+            verify_in_subprocess(file.temporary_file_path())
+        except ImageRejected as exc:
+            self.error = self.error or exc
+            file.close()
+            return None
+        file.seek(0)
+        file.sha256 = self.sha256.hexdigest()
+
+        return file
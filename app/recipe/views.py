@@ -1,6 +1,42 @@
 """
 Views for recipe API.
 """
+import functools
+from collections import Counter
+from decimal import (
+    Decimal,
+    InvalidOperation,
+)
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db import (
+    connection,
+    connections,
+    transaction,
+)
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    FloatField,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+    Value,
+    prefetch_related_objects,
+)
+from django.db.models.functions import (
+    Cast,
+    Coalesce,
+    Length,
+)
+from django.http import StreamingHttpResponse
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -13,60 +49,440 @@ from rest_framework import (
     status
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core.authentication import CachedTokenAuthentication
+from core.renderers import FastJSONRenderer
 from core.models import (
     Recipe,
     Tag,
     Ingredient
     )
 from recipe import serializers
+from recipe.caching import (
+    build_cache_key,
+    response_cache,
+)
+from recipe.listing import (
+    RELATION_FIELDS,
+    recipe_values,
+    serialize_recipe_rows,
+    side_load_relations,
+)
+from recipe.mixins import (
+    ConditionalGetMixin,
+    CachedResponseMixin,
+)
+from recipe.negotiation import (
+    NORMALIZED_FORMAT,
+    NormalizedContentNegotiation,
+    is_normalized,
+)
+from recipe.pagination import (
+    RecipeCursorPagination,
+    RecipeAttrCursorPagination,
+)
+from recipe.uploads import (
+    ImageRejected,
+    RecipeImageUploadHandler,
+    check_content_length,
+)
+
+
+def _is_id(value):
+    """Return whether a bulk item id is an integer, not a bool."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+@functools.lru_cache(maxsize=None)
+def trigram_installed(alias='default'):
+    """Return whether the pg_trgm extension is installed in a database."""
+    conn = connections[alias]
+    if conn.vendor != 'postgresql':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def recipe_attr_prefetches(fields=None):
+    """Return lookups prefetching tags and ingredients serialized columns.
+
+    With fields given, only relations among them are prefetched.
+    """
+    prefetches = [
+        Prefetch(
+            'tags',
+            queryset=Tag.objects.only('id', 'name').order_by('id'),
+        ),
+        Prefetch(
+            'ingredients',
+            queryset=Ingredient.objects.only('id', 'name').order_by('id'),
+        ),
+    ]
+
+    return [
+        prefetch for prefetch in prefetches
+        if fields is None or prefetch.prefetch_to in fields
+    ]
+
+
+def prefetch_recipe_attrs(queryset, fields=None):
+    """Prefetch tags and ingredients with only the serialized columns."""
+    return queryset.prefetch_related(*recipe_attr_prefetches(fields))
+
+
+RECIPE_ORDERINGS = (
+    'price', '-price',
+    'time_minutes', '-time_minutes',
+    'title', '-title',
+    'id', '-id',
+)
+
+# Range filter parameters: (field, lookup, type).
+RECIPE_RANGE_FILTERS = {
+    'price_min': ('price', 'gte', Decimal),
+    'price_max': ('price', 'lte', Decimal),
+    'time_max': ('time_minutes', 'lte', int),
+}
+
+
+# Model columns read by recipe serializer fields other than themselves.
+RECIPE_FIELD_COLUMNS = {
+    'tags': [],
+    'ingredients': [],
+}
+
+SPARSE_FIELDS_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to include',
+    ),
+    OpenApiParameter(
+        'omit',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to leave out',
+    ),
+]
+
+RECIPE_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        'tags',
+        OpenApiTypes.STR,
+        description='Comma separated list of tag IDs to filter',
+    ),
+    OpenApiParameter(
+        'ingredients',
+        OpenApiTypes.STR,
+        description='Comma seperated list of ingredient IDs to filter',
+    ),
+    OpenApiParameter(
+        'match',
+        OpenApiTypes.STR, enum=['any', 'all'],
+        description='Match recipes with any (default) or all of '
+                    'the given tags and ingredients',
+    ),
+    OpenApiParameter(
+        'search',
+        OpenApiTypes.STR,
+        description='Full text search in title and description, '
+                    'best matches first',
+    ),
+    OpenApiParameter(
+        'price_min',
+        OpenApiTypes.DECIMAL,
+        description='Minimum price',
+    ),
+    OpenApiParameter(
+        'price_max',
+        OpenApiTypes.DECIMAL,
+        description='Maximum price',
+    ),
+    OpenApiParameter(
+        'time_max',
+        OpenApiTypes.INT,
+        description='Maximum preparation time in minutes',
+    ),
+    OpenApiParameter(
+        'ordering',
+        OpenApiTypes.STR,
+        enum=list(RECIPE_ORDERINGS),
+        description='Sort order, newest first by default. Range '
+                    'filters sort by their field by default and '
+                    'only combine with ordering on that field',
+    ),
+]
+
+
+NORMALIZED_PARAMETERS = [
+    OpenApiParameter(
+        'format',
+        OpenApiTypes.STR,
+        enum=[NORMALIZED_FORMAT],
+        description='List tag_ids and ingredient_ids on each recipe and '
+                    'the tags and ingredients of the page once, by ID',
+    ),
+]
 
 
 @extend_schema_view(
     list=extend_schema(
-        parameters=[
-            OpenApiParameter(
-                'tags',
-                OpenApiTypes.STR,
-                description='Comma separated list of tag IDs to filter',
-            ),
-            OpenApiParameter(
-                'ingredients',
-                OpenApiTypes.STR,
-                description='Comma seperated list of ingredient IDs to filter',
-            )
-        ]
-    )
+        parameters=RECIPE_FILTER_PARAMETERS + SPARSE_FIELDS_PARAMETERS
+        + NORMALIZED_PARAMETERS,
+    ),
+    retrieve=extend_schema(parameters=SPARSE_FIELDS_PARAMETERS),
+    facets=extend_schema(parameters=RECIPE_FILTER_PARAMETERS),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalGetMixin,
+                    CachedResponseMixin,
+                    viewsets.ModelViewSet):
     """Views for manage recipes."""
     serializer_class = serializers.RecipeDetailSerializer
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.defer('search_vector')
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+    pagination_class = RecipeCursorPagination
+    content_negotiation_class = NormalizedContentNegotiation
+    conditional_actions = ('list', 'retrieve', 'facets')
+    sparse_actions = ('list', 'retrieve', 'export')
+    normalized_actions = ('list',)
+    # Serialize list pages from values() rows instead of model instances.
+    fast_list = True
+    bulk_max_size = 100
+    export_chunk_size = 500
 
-    def _params_to_ints(self, qs):
+    def _params_to_ints(self, qs, param):
         """Convert a list of strings to integers."""
-        return [int(str_id) for str_id in qs.split(',')]
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {param: 'Must be a comma separated list of ids.'}
+            )
+
+    def _filter_by_attrs(self, queryset, field, ids, match):
+        """Filter recipes having any or all attributes with EXISTS."""
+        through = getattr(Recipe, field).through
+        target = f'{getattr(Recipe, field).field.m2m_reverse_field_name()}_id'
+        rows = through.objects.filter(recipe_id=OuterRef('pk'))
+        if match == 'all':
+            for attr_id in set(ids):
+                queryset = queryset.filter(
+                    Exists(rows.filter(**{target: attr_id}))
+                )
+            return queryset
+
+        return queryset.filter(Exists(rows.filter(**{f'{target}__in': ids})))
+
+    def _search_terms(self):
+        """Return the stripped search query parameter."""
+        return self.request.query_params.get('search', '').strip()
+
+    def _search(self, queryset, terms):
+        """Filter recipes matching terms, ranked where supported."""
+        if connection.vendor != 'postgresql':
+            return queryset.filter(
+                Q(title__icontains=terms) | Q(description__icontains=terms)
+            )
+        query = SearchQuery(terms, search_type='websearch', config='english')
+
+        # The rank is real; as double precision it survives the round trip
+        # through pagination cursors exactly.
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), query),
+                FloatField(),
+            ),
+        )
+
+    def _range_filters(self):
+        """Return validated range lookups and the field they apply to."""
+        lookups = {}
+        fields = set()
+        for param, (field, lookup, cast) in RECIPE_RANGE_FILTERS.items():
+            value = self.request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                value = cast(value)
+            except (InvalidOperation, ValueError):
+                raise ValidationError({param: 'Must be a number.'})
+            if isinstance(value, Decimal) and not value.is_finite():
+                raise ValidationError({param: 'Must be a number.'})
+            lookups[f'{field}__{lookup}'] = value
+            fields.add(field)
+        if len(fields) > 1:
+            raise ValidationError(
+                {'non_field_errors': 'Filter by price or by time, not both.'}
+            )
+
+        return lookups, fields.pop() if fields else None
+
+    def _ordering(self):
+        """Return validated ordering served by a (user, field, id) index."""
+        ordering = self.request.query_params.get('ordering')
+        _, range_field = self._range_filters()
+        if ordering is None:
+            return range_field or '-id'
+        if ordering not in RECIPE_ORDERINGS:
+            raise ValidationError(
+                {'ordering': f'Must be one of {", ".join(RECIPE_ORDERINGS)}.'}
+            )
+        if self._search_terms():
+            raise ValidationError(
+                {'ordering': 'Search results are ordered by relevance.'}
+            )
+        if range_field and ordering.lstrip('-') != range_field:
+            raise ValidationError(
+                {'ordering': f'Must be on {range_field} when filtering it.'}
+            )
+
+        return ordering
+
+    def get_pagination_ordering(self):
+        """Return ordering used by the cursor pagination."""
+        ordering = self._ordering()
+        if self._search_terms() and connection.vendor == 'postgresql':
+            return ['-search_rank', '-id']
+        if ordering.lstrip('-') == 'id':
+            return [ordering]
+        direction = '-' if ordering.startswith('-') else ''
+
+        return [ordering, f'{direction}id']
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user"""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        match = self.request.query_params.get('match', 'any')
+        if match not in ('any', 'all'):
+            raise ValidationError({'match': 'Must be "any" or "all".'})
         queryset = self.queryset
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            tag_ids = self._params_to_ints(tags, 'tags')
+            queryset = self._filter_by_attrs(queryset, 'tags', tag_ids, match)
         if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            ingredient_ids = self._params_to_ints(ingredients, 'ingredients')
+            queryset = self._filter_by_attrs(
+                queryset,
+                'ingredients',
+                ingredient_ids,
+                match,
+            )
+        terms = self._search_terms()
+        if terms:
+            queryset = self._search(queryset, terms)
+        range_lookups, _ = self._range_filters()
+        if range_lookups:
+            queryset = queryset.filter(**range_lookups)
 
-        return queryset.filter(
+        queryset = queryset.filter(
             user=self.request.user
-        ).order_by('-id').distinct()
+        ).order_by(*self.get_pagination_ordering())
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            queryset = self._only_columns(queryset, fields)
+
+        return prefetch_recipe_attrs(queryset, fields)
+
+    def _field_names(self, param):
+        """Return list of field names in a query parameter."""
+        value = self.request.query_params.get(param, '')
+
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def get_sparse_fields(self):
+        """Return names of requested serializer fields, None for all."""
+        fields = self._field_names('fields')
+        omit = self._field_names('omit')
+        if self.action not in self.sparse_actions or not (fields or omit):
+            return None
+        available = self.get_serializer_class().Meta.fields
+        for param, names in (('fields', fields), ('omit', omit)):
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise ValidationError(
+                    {param: f'Unknown fields: {", ".join(unknown)}.'}
+                )
+        selected = [
+            name for name in available
+            if (not fields or name in fields) and name not in omit
+        ]
+        if not selected:
+            raise ValidationError({'fields': 'Select at least one field.'})
+
+        return selected
+
+    def _only_columns(self, queryset, fields):
+        """Load only the columns read by fields and the pagination."""
+        columns = {'id'}
+        for name in fields:
+            columns.update(RECIPE_FIELD_COLUMNS.get(name, [name]))
+        for name in self.get_pagination_ordering():
+            name = name.lstrip('-')
+            if name != 'search_rank':
+                columns.add(name)
+
+        return queryset.only(*sorted(columns))
+
+    def list(self, request, *args, **kwargs):
+        """List recipes, using the response cache if enabled."""
+        handler = self._fast_list if self.fast_list else super().list
+        return self.cached_response(handler, request, *args, **kwargs)
+
+    def _fast_list(self, request, *args, **kwargs):
+        """List recipes built from values() rows, as super().list would."""
+        serializer = self.get_serializer()
+        rows = recipe_values(
+            self.filter_queryset(self.get_queryset()),
+            serializer.fields,
+            self.get_pagination_ordering(),
+        )
+        page = self.paginate_queryset(rows)
+        data = serialize_recipe_rows(
+            rows if page is None else page,
+            serializer,
+            request,
+        )
+        if page is None:
+            return Response(data)
+
+        return self.get_paginated_response(data)
+
+    def get_paginated_response(self, data):
+        """Side-load tags and ingredients of the page when normalized."""
+        if self.action not in self.normalized_actions or \
+                not is_normalized(self.request):
+            return super().get_paginated_response(data)
+        included = side_load_relations(
+            data,
+            self.get_sparse_fields() or RELATION_FIELDS,
+        )
+        response = super().get_paginated_response(data)
+        response.data.update(included)
+
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve recipe, using the response cache if enabled."""
+        return self.cached_response(
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def get_serializer_context(self):
+        """Pass requested sparse fieldset to the serializer."""
+        context = super().get_serializer_context()
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            context['fields'] = fields
+
+        return context
 
     def get_serializer_class(self):
         """Return serializer class according to request."""
@@ -74,6 +490,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return serializers.RecipeSerializer
         elif self.action == 'upload_image':
             return serializers.ImageSerializer
+        elif self.action == 'facets':
+            return serializers.FacetsSerializer
 
         return self.serializer_class
 
@@ -81,11 +499,193 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
 
+    def _bulk_entries(self, items):
+        """Validate bulk items and return (entries, errors) per item."""
+        ids = [
+            item['id'] for item in items
+            if isinstance(item, dict) and _is_id(item.get('id'))
+        ]
+        id_counts = Counter(ids)
+        instances = Recipe.objects.filter(user=self.request.user).in_bulk(
+            list(id_counts)
+        )
+        entries, errors = [], []
+        for item in items:
+            if not isinstance(item, dict):
+                entries.append(None)
+                errors.append({'non_field_errors': ['Expected an object.']})
+                continue
+            instance = None
+            if item.get('id') is not None:
+                recipe_id = item['id']
+                if not _is_id(recipe_id):
+                    error = 'A valid integer is required.'
+                elif id_counts[recipe_id] > 1:
+                    error = 'Recipe is listed more than once.'
+                else:
+                    instance = instances.get(recipe_id)
+                    error = 'Recipe not found.' if instance is None else None
+                if error:
+                    entries.append(None)
+                    errors.append({'id': [error]})
+                    continue
+            serializer = self.get_serializer(
+                instance,
+                data=item,
+                partial=instance is not None,
+            )
+            if serializer.is_valid():
+                entries.append((instance, serializer.validated_data))
+                errors.append({})
+            else:
+                entries.append(None)
+                errors.append(serializer.errors)
+
+        return entries, errors
+
+    @extend_schema(request=serializers.RecipeDetailSerializer(many=True))
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create recipes, or update those with an id, in one request."""
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'non_field_errors': ['Expected a non-empty list.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > self.bulk_max_size:
+            return Response(
+                {'non_field_errors': [
+                    f'Ensure there are no more than {self.bulk_max_size} '
+                    'items.'
+                ]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        entries, errors = self._bulk_entries(items)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer()
+        recipes = serializer.bulk_save(entries, user=request.user)
+        saved = prefetch_recipe_attrs(Recipe.objects.filter(
+            id__in=[recipe.id for recipe in recipes]
+        )).in_bulk()
+        serializer = self.get_serializer(
+            [saved[recipe.id] for recipe in recipes],
+            many=True,
+        )
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def _export_batch(self, recipes):
+        """Yield NDJSON lines for a batch of recipes."""
+        renderer = FastJSONRenderer()
+        context = self.get_serializer_context()
+        prefetch_related_objects(
+            recipes,
+            *recipe_attr_prefetches(context.get('fields')),
+        )
+        for recipe in recipes:
+            data = serializers.RecipeDetailSerializer(
+                recipe,
+                context=context,
+            ).data
+            yield renderer.render(data) + b'\n'
+
+    def _export_lines(self, queryset):
+        """Yield NDJSON lines reading recipes with a server-side cursor.
+
+        In autocommit the cursor would be declared WITH HOLD, which makes
+        PostgreSQL run the whole query before the first row is fetched.
+        """
+        with transaction.atomic(using=queryset.db, savepoint=False):
+            batch = []
+            for recipe in queryset.iterator(
+                chunk_size=self.export_chunk_size,
+            ):
+                batch.append(recipe)
+                if len(batch) == self.export_chunk_size:
+                    yield from self._export_batch(batch)
+                    batch = []
+            if batch:
+                yield from self._export_batch(batch)
+
+    @extend_schema(
+        parameters=RECIPE_FILTER_PARAMETERS + SPARSE_FIELDS_PARAMETERS,
+        responses={(200, 'application/x-ndjson'): OpenApiTypes.STR},
+    )
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream all recipes of the user as newline delimited JSON."""
+        queryset = self.get_queryset().prefetch_related(None)
+        response = StreamingHttpResponse(
+            self._export_lines(queryset),
+            content_type='application/x-ndjson',
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="recipes.ndjson"'
+        )
+
+        return response
+
+    def _facet_counts(self, queryset):
+        """Return recipe counts per tag and ingredient in one query."""
+        recipe_ids = queryset.order_by().values('id')
+        counts = []
+        for field in ('tags', 'ingredients'):
+            through = getattr(Recipe, field).through
+            target = getattr(Recipe, field).field.m2m_reverse_field_name()
+            counts.append(
+                through.objects.filter(recipe_id__in=recipe_ids)
+                .values(
+                    attr_id=F(f'{target}_id'),
+                    name=F(f'{target}__name'),
+                )
+                .annotate(field=Value(field), count=Count('id'))
+            )
+        facets = {'tags': [], 'ingredients': []}
+        for row in counts[0].union(counts[1], all=True):
+            facets[row['field']].append(
+                {'id': row['attr_id'], 'name': row['name'],
+                 'count': row['count']}
+            )
+        for items in facets.values():
+            items.sort(key=lambda item: (-item['count'], item['name']))
+
+        return facets
+
+    @action(methods=['GET'], detail=False, url_path='facets')
+    def facets(self, request):
+        """Return recipe counts per tag and ingredient of the user.
+
+        The recipe filters of the list apply. Results are cached until the
+        data version of the user changes.
+        """
+        key = build_cache_key(request, type(self).__name__, self.action)
+
+        def compute():
+            facets = self._facet_counts(self.get_queryset())
+            return self.get_serializer(facets).data
+
+        return Response(
+            response_cache.get_or_set(request.user.id, key, compute)
+        )
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to recipe."""
         recipe = self.get_object()
-        serializer = self.get_serializer(recipe, data=request.data)
+        handler = RecipeImageUploadHandler(request._request)
+        request._request.upload_handlers = [handler]
+        try:
+            check_content_length(request.META)
+            data = request.data
+            if handler.error:
+                raise handler.error
+        except ImageRejected as exc:
+            return Response({'image': [str(exc)]}, status=exc.status_code)
+        serializer = self.get_serializer(recipe, data=data)
 
         if serializer.is_valid():
             serializer.save()
@@ -101,38 +701,142 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'assigned_only',
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items assigned to recipes'
-            )
+            ),
+            OpenApiParameter(
+                'with_counts',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Include the number of recipes of each item',
+            ),
         ]
-    )
+    ),
+    autocomplete=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                required=True,
+                description='Typed prefix or misspelled name',
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Number of suggestions, at most 20',
+            ),
+        ]
+    ),
 )
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
+class BaseRecipeAttrViewSet(ConditionalGetMixin,
+                            CachedResponseMixin,
+                            mixins.DestroyModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
     """Manage recipes atrributes in database."""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeAttrCursorPagination
+    autocomplete_limit = 10
+    autocomplete_max_limit = 20
+
+    def _flag(self, name):
+        """Return boolean value of a 0/1 query parameter."""
+        try:
+            return bool(int(self.request.query_params.get(name, 0)))
+        except ValueError:
+            raise ValidationError({name: 'Must be 0 or 1.'})
+
+    def _recipe_rows(self):
+        """Return recipe relation rows of the outer item."""
+        field = getattr(Recipe, self.recipe_field).field
+        target = f'{field.m2m_reverse_field_name()}_id'
+
+        return field.remote_field.through.objects.filter(
+            **{target: OuterRef('pk')}
+        ).order_by().values(target)
 
     def get_queryset(self):
         """Return tags for authenticated user."""
-        assigned_only = bool(
-            int(self.request.query_params.get('assigned_only', 0))
-        )
         queryset = self.queryset
-        if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+        if self._flag('assigned_only'):
+            queryset = queryset.filter(Exists(self._recipe_rows()))
+        if self._flag('with_counts'):
+            counts = self._recipe_rows().annotate(count=Count('*'))
+            queryset = queryset.annotate(
+                recipe_count=Coalesce(Subquery(counts.values('count')), 0),
+            )
 
         return queryset.filter(
-            user=self.request.user).order_by('-name').distinct()
+            user=self.request.user).order_by('-name')
+
+    def get_serializer_class(self):
+        """Return serializer with recipe counts when requested."""
+        if self.action == 'list' and self._flag('with_counts'):
+            return self.count_serializer_class
+
+        return self.serializer_class
+
+    def list(self, request, *args, **kwargs):
+        """List items, using the response cache if enabled."""
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def _autocomplete_limit(self):
+        """Return requested number of suggestions within the cap."""
+        try:
+            limit = int(
+                self.request.query_params.get('limit', self.autocomplete_limit)
+            )
+        except ValueError:
+            raise ValidationError({'limit': 'Must be an integer.'})
+
+        return max(1, min(limit, self.autocomplete_max_limit))
+
+    def _suggestions(self, term, limit):
+        """Return names starting with term, then names similar to it."""
+        queryset = self.queryset.filter(
+            user=self.request.user,
+        ).only('id', 'name')
+        matches = list(
+            queryset.filter(name__istartswith=term)
+            .order_by(Length('name'), 'name', 'id')[:limit]
+        )
+        if len(matches) == limit:
+            return matches
+
+        others = queryset.exclude(id__in=[item.id for item in matches])
+        if trigram_installed(queryset.db):
+            others = others.filter(name__trigram_similar=term).annotate(
+                similarity=TrigramSimilarity('name', term),
+            ).order_by('-similarity', 'name', 'id')
+        else:
+            others = others.filter(name__icontains=term).order_by(
+                Length('name'), 'name', 'id',
+            )
+
+        return matches + list(others[:limit - len(matches)])
+
+    @action(methods=['GET'], detail=False, url_path='autocomplete')
+    def autocomplete(self, request):
+        """Return names matching a typed prefix or misspelling."""
+        term = request.query_params.get('q', '').strip()
+        if not term:
+            raise ValidationError({'q': 'This parameter is required.'})
+        suggestions = self._suggestions(term, self._autocomplete_limit())
+        serializer = self.get_serializer(suggestions, many=True)
+
+        return Response(serializer.data)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database."""
     serializer_class = serializers.TagSerializer
+    count_serializer_class = serializers.TagCountSerializer
     queryset = Tag.objects.all()
+    recipe_field = 'tags'
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     """Manage ingredient in the database"""
     serializer_class = serializers.IngredientSerializer
+    count_serializer_class = serializers.IngredientCountSerializer
     queryset = Ingredient.objects.all()
+    recipe_field = 'ingredients'
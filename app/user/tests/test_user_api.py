@@ -1,6 +1,8 @@
 """
 Tests for user api
 """
+import msgpack
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -83,6 +85,21 @@ class PublicUserApiTests(TestCase):
         self.assertIn('token', res.data)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_create_token_as_msgpack(self):
+        """Test token credentials can be sent as MessagePack."""
+        create_user(email='test@example.com', password='testpass123')
+        payload = {'email': 'test@example.com', 'password': 'testpass123'}
+
+        res = self.client.post(
+            TOKEN_URL,
+            msgpack.packb(payload),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', msgpack.unpackb(res.content))
+
     def test_create_user_bad_credentials(self):
         """Test create user error credentials invalid."""
         create_user(email='test@example.com', password='goodpass')
@@ -148,4 +165,20 @@ class PrivatUserApiTests(TestCase):
         self.user.refresh_from_db
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(self.user.name, payload['name'])
-        self.assertTrue(self.user.check_password(payload['password']))
\ No newline at end of file
+        self.assertTrue(self.user.check_password(payload['password']))
+
+    def test_profile_as_msgpack(self):
+        """Test reading and updating the profile as MessagePack."""
+        res = self.client.patch(
+            ME_URL,
+            msgpack.packb({'name': 'NewName'}),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(res.content), {
+            'name': 'NewName',
+            'email': self.user.email,
+        })
@@ -5,6 +5,12 @@ server {
         alias /vol/static;
     }
 
+    # Content addressed recipe images and their variants never change.
+    location ~ "^/static/media/uploads/recipe/(blobs/|variants/[0-9a-f]{64}_)" {
+        root /vol;
+        add_header Cache-Control "public, max-age=31536000, immutable";
+    }
+
     location / {
         uwsgi_pass           ${APP_HOST}:${APP_PORT};
         include              /etc/nginx/uwsgi_params;